@@ -44,6 +44,9 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'dictionary.middleware.DatasetMiddleware',
+    'dictionary.middleware.QueryLogMiddleware',
+    'dictionary.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -83,6 +86,12 @@ DATABASES = {
     }
 }
 
+# Dictionary data is served from the active dataset generation, a separate
+# SQLite database per import stored under DICTIONARY_GENERATIONS_DIR
+DATABASE_ROUTERS = ['dictionary.routers.DatasetRouter']
+
+DICTIONARY_GENERATIONS_DIR = BASE_DIR / 'generations'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -130,4 +139,14 @@ APPEND_SLASH = True
 REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 50,  # Set a suitable page size
-}
\ No newline at end of file
+}
+
+# Precomputed search indexes, built by populate_db.py and stored per dataset version
+DICTIONARY_INDEX_DIR = BASE_DIR / 'indexes'
+
+# Seconds a request waits for an identical in-flight search before giving up
+DICTIONARY_SINGLE_FLIGHT_TIMEOUT = 30
+
+# Set to a file path to sample dictionary searches into a log for replay_queries.py
+DICTIONARY_QUERY_LOG = None
+DICTIONARY_QUERY_LOG_SAMPLE_RATE = 0.1
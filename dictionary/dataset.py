@@ -0,0 +1,182 @@
+import contextvars
+import copy
+import json
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from django.conf import settings
+from django.db import connections
+from .models import DatasetVersion
+
+# Version reported for databases populated before versioning was introduced
+UNVERSIONED = '0'
+
+# Generation targeted by an import in progress in this context, if any
+_staging_generation = contextvars.ContextVar('staging_generation', default=None)
+
+# (generation, version) pinned for the request being served in this context,
+# so every query and index lookup of a request sees the same dataset
+_pinned_dataset = contextvars.ContextVar('pinned_dataset', default=None)
+
+_pointer_cache = {'stat': None, 'pointer': {}}
+_pointer_lock = threading.Lock()
+_alias_lock = threading.Lock()
+
+
+def generations_dir():
+    return Path(settings.DICTIONARY_GENERATIONS_DIR)
+
+
+def pointer_path():
+    return generations_dir() / 'CURRENT.json'
+
+
+def read_pointer():
+    """
+    Return the generation pointer, {'current': version, 'previous': version},
+    or {} if no generation was ever activated. The file is only re-read when
+    it has been replaced, so checking it on every request costs one stat().
+    """
+    try:
+        stat = pointer_path().stat()
+    except FileNotFoundError:
+        return {}
+    key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    with _pointer_lock:
+        if _pointer_cache['stat'] != key:
+            with open(pointer_path(), encoding='utf-8') as f:
+                _pointer_cache['pointer'] = json.load(f)
+            _pointer_cache['stat'] = key
+        return _pointer_cache['pointer']
+
+
+def write_pointer(pointer):
+    """
+    Atomically replace the generation pointer, switching readers to the new
+    current generation from their next request.
+    """
+    generations_dir().mkdir(parents=True, exist_ok=True)
+    temporary_path = pointer_path().with_suffix('.tmp')
+    with open(temporary_path, 'w', encoding='utf-8') as f:
+        json.dump(pointer, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary_path, pointer_path())
+
+
+def generation_path(version):
+    return generations_dir() / version / 'db.sqlite3'
+
+
+def generation_alias(version):
+    """
+    Return the database alias of a generation, registering its SQLite
+    database with Django on first use.
+    """
+    alias = f'generation_{version}'
+    if alias not in connections.settings:
+        with _alias_lock:
+            if alias not in connections.settings:
+                # Start from the fully configured default settings
+                settings_dict = copy.deepcopy(connections.settings['default'])
+                settings_dict.update({
+                    'ENGINE': 'django.db.backends.sqlite3',
+                    'NAME': generation_path(version),
+                    'OPTIONS': {},
+                })
+                connections.settings[alias] = settings_dict
+    return alias
+
+
+def is_generation_alias(alias):
+    return alias.startswith('generation_')
+
+
+def serving_generation():
+    """
+    Generation dictionary models are read from in this context: the one being
+    imported, else the one pinned for the current request, else the current
+    generation. An empty string stands for the 'default' database, populated
+    in place before generations were introduced.
+    """
+    staging = _staging_generation.get()
+    if staging:
+        return staging
+    pinned = _pinned_dataset.get()
+    if pinned is not None:
+        return pinned[0]
+    return read_pointer().get('current') or ''
+
+
+def active_alias():
+    generation = serving_generation()
+    return generation_alias(generation) if generation else 'default'
+
+
+@contextmanager
+def pinned_dataset():
+    """
+    Pin the current generation and dataset version for the duration of the
+    block, so a swap landing mid-request does not mix two generations.
+    """
+    generation = read_pointer().get('current') or ''
+    token = _pinned_dataset.set((generation, generation or _legacy_version()))
+    try:
+        yield
+    finally:
+        _pinned_dataset.reset(token)
+
+
+@contextmanager
+def staging_generation(version):
+    """
+    Route dictionary models to a new generation's database within the block,
+    without affecting the generation served to readers.
+    """
+    generation_path(version).parent.mkdir(parents=True, exist_ok=True)
+    token = _staging_generation.set(version)
+    try:
+        yield generation_alias(version)
+    finally:
+        _staging_generation.reset(token)
+
+
+def activate_generation(version):
+    """
+    Make `version` the current generation, keeping the one it replaces as the
+    rollback target.
+    """
+    pointer = read_pointer()
+    previous = pointer.get('current')
+    if previous == version:
+        previous = pointer.get('previous')
+    write_pointer({'current': version, 'previous': previous})
+
+
+def rollback_generation():
+    """
+    Switch readers back to the previous generation, and return its version.
+    """
+    pointer = read_pointer()
+    if not pointer.get('previous'):
+        raise ValueError("There is no previous generation to roll back to.")
+    write_pointer({'current': pointer['previous'], 'previous': pointer['current']})
+    return pointer['previous']
+
+
+def _legacy_version():
+    version = DatasetVersion.objects.order_by('-id').values_list('version', flat=True).first()
+    return version or UNVERSIONED
+
+
+def current_version():
+    """
+    Return the version of the dictionary dataset currently being served.
+    A new version is recorded by every import, so anything derived from the
+    data (ETags, precomputed indexes) can be keyed on it.
+    """
+    pinned = _pinned_dataset.get()
+    if pinned is not None and not _staging_generation.get():
+        return pinned[1]
+    return serving_generation() or _legacy_version()
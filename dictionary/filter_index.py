@@ -0,0 +1,59 @@
+import numpy as np
+from .indexes import index_dir, load_index, read_json, write_json
+from .models import LexicalEntry, RelatedForm
+
+EMPTY_POSTING = np.empty(0, dtype=np.int64)
+
+
+class FilterIndex:
+    """
+    Sorted arrays of lexical entry auto_ids for every part_of_speech, scheme
+    and root value, so filters are applied by intersecting id arrays instead
+    of joining through lemma and related_forms.
+    """
+
+    def __init__(self, postings):
+        self.postings = {
+            field: {value: np.asarray(ids, dtype=np.int64) for value, ids in values.items()}
+            for field, values in postings.items()
+        }
+
+    @classmethod
+    def load(cls, directory):
+        return cls(read_json(directory, 'filter_index.json'))
+
+    def filter(self, entry_ids, filters):
+        """
+        Return the sorted unique auto_ids among `entry_ids` that match every
+        filter in `filters`, a mapping of field name to required value.
+        """
+        matches = np.unique(entry_ids)
+        for field, value in filters.items():
+            posting = self.postings[field].get(value, EMPTY_POSTING)
+            matches = np.intersect1d(matches, posting, assume_unique=True)
+        return matches
+
+
+def build_filter_index(version):
+    """
+    Build the part_of_speech, scheme and root postings of a dataset version
+    and store them in the version's index directory.
+    """
+    postings = {'part_of_speech': {}, 'scheme': {}, 'root': {}}
+    entries = LexicalEntry.objects.values_list('auto_id', 'part_of_speech', 'lemma__scheme')
+    for auto_id, part_of_speech, scheme in entries.iterator():
+        postings['part_of_speech'].setdefault(part_of_speech, []).append(auto_id)
+        if scheme is not None:
+            postings['scheme'].setdefault(scheme, []).append(auto_id)
+    roots = RelatedForm.objects.filter(type='root').values_list('lexical_entry_id', 'targets')
+    for auto_id, root in roots.iterator():
+        postings['root'].setdefault(root, []).append(auto_id)
+
+    for values in postings.values():
+        for value, ids in values.items():
+            values[value] = sorted(set(ids))
+    write_json(index_dir(version), 'filter_index.json', postings)
+
+
+def get_filter_index():
+    return load_index('filters', FilterIndex.load)
@@ -0,0 +1,48 @@
+from .indexes import index_dir, load_index, read_json, write_json
+from .models import LexicalEntry
+from .utils import remove_diacritics
+
+
+class HomonymIndex:
+    """
+    Lexical entry auto_ids grouped by XML entry id and by lemma without
+    diacritics, so every homonym of a word is found with two lookups.
+    """
+
+    def __init__(self, groups):
+        self.ids = groups['ids']
+        self.lemmas = groups['lemmas']
+
+    @classmethod
+    def load(cls, directory):
+        return cls(read_json(directory, 'homonyms.json'))
+
+    def lookup(self, query):
+        """
+        Return the sorted auto_ids of entries whose id or bare lemma is the
+        query, with or without its diacritics.
+        """
+        stripped_query = remove_diacritics(query)
+        entry_ids = set()
+        for key in {query, stripped_query}:
+            entry_ids.update(self.ids.get(key, []))
+        entry_ids.update(self.lemmas.get(stripped_query, []))
+        return sorted(entry_ids)
+
+
+def build_homonym_index(version):
+    """
+    Group the lexical entries of a dataset version by id and by bare lemma,
+    and store the mapping in the version's index directory.
+    """
+    ids, lemmas = {}, {}
+    entries = LexicalEntry.objects.values_list('auto_id', 'id', 'lemma__written_form').order_by('auto_id')
+    for auto_id, entry_id, written_form in entries.iterator():
+        ids.setdefault(entry_id, []).append(auto_id)
+        if written_form:
+            lemmas.setdefault(remove_diacritics(written_form), []).append(auto_id)
+    write_json(index_dir(version), 'homonyms.json', {'ids': ids, 'lemmas': lemmas})
+
+
+def get_homonym_index():
+    return load_index('homonyms', HomonymIndex.load)
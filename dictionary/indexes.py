@@ -0,0 +1,46 @@
+import json
+import threading
+from pathlib import Path
+from django.conf import settings
+from .dataset import current_version
+
+_loaded_indexes = {}
+_loaded_indexes_lock = threading.Lock()
+
+
+def index_dir(version):
+    """
+    Directory holding the precomputed indexes of a dataset version.
+    """
+    return Path(settings.DICTIONARY_INDEX_DIR) / version
+
+
+def write_json(directory, filename, data):
+    directory.mkdir(parents=True, exist_ok=True)
+    with open(directory / filename, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+
+
+def read_json(directory, filename):
+    with open(directory / filename, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load_index(name, loader):
+    """
+    Return the named index for the dataset version being served, reading it with
+    `loader(directory)` on first use. Indexes of older versions are released.
+    Raises FileNotFoundError if the index was not built for this version.
+    """
+    version = current_version()
+    key = (name, version)
+    index = _loaded_indexes.get(key)
+    if index is None:
+        with _loaded_indexes_lock:
+            index = _loaded_indexes.get(key)
+            if index is None:
+                index = loader(index_dir(version))
+                for stale_key in [k for k in _loaded_indexes if k[0] == name]:
+                    del _loaded_indexes[stale_key]
+                _loaded_indexes[key] = index
+    return index
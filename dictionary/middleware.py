@@ -0,0 +1,106 @@
+import json
+import random
+import threading
+import time
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+from django.utils.regex_helper import _lazy_re_compile
+from .dataset import pinned_dataset
+from .utils import SEARCH_STAGE_HEADER
+
+try:
+    import brotli
+except ImportError:  # Brotli support is optional
+    brotli = None
+
+re_accepts_brotli = _lazy_re_compile(r'\bbr\b')
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    Compress responses with Brotli when the client accepts it and the optional
+    `brotli` package is installed, falling back to Django's gzip handling.
+    """
+
+    def process_response(self, request, response):
+        accept_encoding = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        if (
+            brotli is None
+            or not re_accepts_brotli.search(accept_encoding)
+            or response.streaming
+            or len(response.content) < 200
+            or response.has_header('Content-Encoding')
+        ):
+            return super().process_response(request, response)
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        # Return the compressed content only if it's actually shorter
+        compressed_content = brotli.compress(response.content)
+        if len(compressed_content) >= len(response.content):
+            return response
+        response.content = compressed_content
+        response.headers['Content-Length'] = str(len(response.content))
+
+        # Compressed representations only carry weak ETags
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = 'br'
+        return response
+
+
+class DatasetMiddleware:
+    """
+    Pins the dataset generation for the whole request, so its queries, index
+    lookups and ETag all come from one generation even if an import switches
+    readers to a new one meanwhile.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with pinned_dataset():
+            return self.get_response(request)
+
+
+class QueryLogMiddleware:
+    """
+    Samples requests to the dictionary search endpoints into a JSON-lines log
+    that replay_queries.py can fire back at a server. Enabled by setting
+    DICTIONARY_QUERY_LOG to a file path; DICTIONARY_QUERY_LOG_SAMPLE_RATE is
+    the fraction of requests recorded.
+    """
+
+    logged_views = {'search-by-keyword', 'search-by-root', 'phrase-search'}
+
+    def __init__(self, get_response):
+        self.log_path = getattr(settings, 'DICTIONARY_QUERY_LOG', None)
+        if not self.log_path:
+            raise MiddlewareNotUsed
+        self.sample_rate = getattr(settings, 'DICTIONARY_QUERY_LOG_SAMPLE_RATE', 1.0)
+        self.get_response = get_response
+        self.lock = threading.Lock()
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        response = self.get_response(request)
+        elapsed = time.perf_counter() - start
+
+        match = request.resolver_match
+        if match and match.url_name in self.logged_views and random.random() < self.sample_rate:
+            record = {
+                'time': round(time.time(), 3),
+                'path': request.path,
+                'params': {key: request.GET.getlist(key) for key in request.GET},
+                'status': response.status_code,
+                'stage': response.get(SEARCH_STAGE_HEADER),
+                'ms': round(elapsed * 1000, 2),
+            }
+            line = json.dumps(record, ensure_ascii=False, separators=(',', ':'))
+            with self.lock, open(self.log_path, 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+        return response
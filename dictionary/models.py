@@ -2,7 +2,7 @@ from django.db import models
 
 class LexicalEntry(models.Model):
     auto_id = models.AutoField(primary_key=True)
-    id = models.CharField(max_length=50)
+    id = models.CharField(max_length=50, db_index=True)  # Indexed
     part_of_speech = models.CharField(max_length=50, db_index=True)  # Indexed
 
 class Lemma(models.Model):
@@ -40,3 +40,17 @@ class Context(models.Model):
 class SyntacticBehaviour(models.Model):
     lexical_entry = models.ForeignKey(LexicalEntry, on_delete=models.CASCADE, related_name="syntactic_behaviours")
     subcategorization_frames = models.CharField(max_length=255, db_index=True)  # Added indexing for filtering
+
+class DatasetVersion(models.Model):
+    version = models.CharField(max_length=64, unique=True)  # Indexed
+    created_at = models.DateTimeField(auto_now_add=True)
+
+class Phrase(models.Model):
+    sense = models.ForeignKey(Sense, on_delete=models.CASCADE, related_name="phrases")
+    source = models.CharField(max_length=20)  # 'definition' or 'context'
+    text = models.TextField()
+    normalized_text = models.TextField(db_index=True)  # Indexed for exact idiom lookups
+
+class PhraseGram(models.Model):
+    phrase = models.ForeignKey(Phrase, on_delete=models.CASCADE, related_name="grams")
+    gram = models.CharField(max_length=255, db_index=True)  # Indexed word unigram or bigram
@@ -0,0 +1,100 @@
+from .indexes import index_dir, load_index, read_json, write_json
+from .models import Lemma, RelatedForm
+from .utils import has_diacritics, remove_diacritics, normalize_for_variations
+
+# Characters standing for any single letter in a pattern
+WILDCARDS = {'?', '؟'}
+
+
+def skeleton(text):
+    """
+    Bare letters of a word: diacritics and tatweel removed and spelling
+    variations normalized, one character per letter.
+    """
+    return normalize_for_variations(remove_diacritics(text)).replace('\u0640', '')
+
+
+class PatternIndex:
+    """
+    Postings of lexical entry auto_ids keyed by lemma length, letter slot
+    (length, position, letter), scheme and root letter. Pattern queries are
+    answered by intersecting postings.
+    """
+
+    def __init__(self, postings):
+        self.lengths = {key: set(ids) for key, ids in postings['lengths'].items()}
+        self.slots = {key: set(ids) for key, ids in postings['slots'].items()}
+        self.schemes = {key: set(ids) for key, ids in postings['schemes'].items()}
+        self.root_letters = {key: set(ids) for key, ids in postings['root_letters'].items()}
+
+    @classmethod
+    def load(cls, directory):
+        return cls(read_json(directory, 'pattern_index.json'))
+
+    def search(self, pattern=None, scheme=None, root_contains=None):
+        """
+        Return the sorted auto_ids of entries whose lemma matches `pattern`
+        ('?' matches any letter), whose scheme is `scheme` (compared without
+        diacritics unless it has any) and whose root contains every letter of
+        `root_contains`.
+        """
+        postings = []
+        if pattern:
+            letters = skeleton(pattern)
+            postings.append(self.lengths.get(str(len(letters)), set()))
+            for position, letter in enumerate(letters):
+                if letter not in WILDCARDS:
+                    postings.append(self.slots.get(f'{len(letters)}:{position}:{letter}', set()))
+        if scheme:
+            postings.append(self.schemes.get(scheme if has_diacritics(scheme) else skeleton(scheme), set()))
+        if root_contains:
+            for letter in set(skeleton(root_contains)):
+                postings.append(self.root_letters.get(letter, set()))
+        if not postings:
+            return []
+
+        # Intersect starting from the rarest posting
+        postings.sort(key=len)
+        matches = set(postings[0])
+        for posting in postings[1:]:
+            matches &= posting
+            if not matches:
+                break
+        return sorted(matches)
+
+
+def build_pattern_index(version):
+    """
+    Build the lemma slot, scheme and root-letter postings of a dataset version
+    and store them in the version's index directory.
+    """
+    lengths, slots, schemes, root_letters = {}, {}, {}, {}
+    for entry_id, written_form, scheme in Lemma.objects.values_list('lexical_entry_id', 'written_form', 'scheme').iterator():
+        letters = skeleton(written_form)
+        lengths.setdefault(str(len(letters)), []).append(entry_id)
+        for position, letter in enumerate(letters):
+            slots.setdefault(f'{len(letters)}:{position}:{letter}', []).append(entry_id)
+        if scheme:
+            # Index the scheme as written and without diacritics
+            for key in {scheme, skeleton(scheme)}:
+                schemes.setdefault(key, []).append(entry_id)
+
+    roots = RelatedForm.objects.filter(type='root').values_list('lexical_entry_id', 'targets')
+    for entry_id, root in roots.iterator():
+        for letter in set(skeleton(root)):
+            root_letters.setdefault(letter, []).append(entry_id)
+
+    postings = {
+        'lengths': lengths,
+        'slots': slots,
+        'schemes': schemes,
+        'root_letters': root_letters,
+    }
+    for index in postings.values():
+        for key, ids in index.items():
+            index[key] = sorted(set(ids))
+    write_json(index_dir(version), 'pattern_index.json', postings)
+
+
+def get_pattern_index():
+    return load_index('pattern', PatternIndex.load)
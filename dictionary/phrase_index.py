@@ -0,0 +1,145 @@
+from .models import Definition, Context, Phrase, PhraseGram
+from .utils import tokenize
+
+# Rows fetched per query when resolving candidate phrases
+CHUNK_SIZE = 500
+
+# Phrases built and stored together when indexing
+BUILD_CHUNK_SIZE = 1000
+
+
+def normalize_phrase(text):
+    """
+    Normalized form of a phrase: its terms joined by single spaces.
+    """
+    return ' '.join(tokenize(text))
+
+
+def clitic_variants(term):
+    """
+    The term and the forms left by stripping its proclitics in turn: a
+    conjunction (و, ف), then a preposition (ب, ل, ك) or لل, then the article.
+    Indexing these lets a query match a word written with attached clitics,
+    as a substring search would.
+    """
+    variants = {term}
+    stem = term
+    if stem[:1] in ('و', 'ف') and len(stem) > 3:
+        stem = stem[1:]
+        variants.add(stem)
+    if stem[:2] == 'لل' and len(stem) > 4:
+        stem = stem[2:]
+        variants.add(stem)
+    else:
+        if stem[:1] in ('ب', 'ل', 'ك') and len(stem) > 3:
+            stem = stem[1:]
+            variants.add(stem)
+        if stem[:2] == 'ال' and len(stem) > 3:
+            stem = stem[2:]
+            variants.add(stem)
+    return variants
+
+
+def phrase_grams(terms):
+    """
+    Word unigrams and bigrams of a phrase, the keys of its postings. The first
+    word of each gram is also indexed without its proclitics, since only the
+    start of a substring match may fall inside a word.
+    """
+    grams = set()
+    for position, term in enumerate(terms):
+        for variant in clitic_variants(term):
+            grams.add(variant)
+            if position + 1 < len(terms):
+                grams.add(f'{variant} {terms[position + 1]}')
+    return grams
+
+
+def contains_terms(terms, query_terms):
+    """
+    Whether `query_terms` occur as a run of `terms`, the first query term
+    possibly with proclitics attached in the phrase.
+    """
+    length = len(query_terms)
+    for start in range(len(terms) - length + 1):
+        if query_terms[0] in clitic_variants(terms[start]) and terms[start + 1:start + length] == query_terms[1:]:
+            return True
+    return False
+
+
+def query_grams(terms):
+    """
+    Postings needed to find a query: its bigrams, or its only term.
+    """
+    if len(terms) == 1:
+        return set(terms)
+    return {f'{first} {second}' for first, second in zip(terms, terms[1:])}
+
+
+def find_phrases(query, exact=False):
+    """
+    Return a Phrase queryset matching the query: phrases equal to it once
+    normalized if `exact`, otherwise phrases containing it as a run of words,
+    its first word possibly preceded by proclitics. Candidates come from the gram postings and are verified against the
+    normalized text, so no text column is scanned.
+    """
+    normalized_query = normalize_phrase(query)
+    if not normalized_query:
+        return Phrase.objects.none()
+    if exact:
+        return Phrase.objects.filter(normalized_text=normalized_query)
+
+    terms = normalized_query.split()
+    grams = query_grams(terms)
+    if len(terms) <= 2:
+        # A single posting matches the whole query
+        return Phrase.objects.filter(id__in=PhraseGram.objects.filter(gram=grams.pop()).values('phrase_id'))
+
+    candidates = None
+    for gram in grams:
+        phrase_ids = set(PhraseGram.objects.filter(gram=gram).values_list('phrase_id', flat=True))
+        candidates = phrase_ids if candidates is None else candidates & phrase_ids
+        if not candidates:
+            return Phrase.objects.none()
+
+    candidates = sorted(candidates)
+    matches = []
+    for start in range(0, len(candidates), CHUNK_SIZE):
+        chunk = Phrase.objects.filter(id__in=candidates[start:start + CHUNK_SIZE])
+        for phrase_id, normalized_text in chunk.values_list('id', 'normalized_text'):
+            if contains_terms(normalized_text.split(), terms):
+                matches.append(phrase_id)
+    return Phrase.objects.filter(id__in=matches)
+
+
+def _store_phrases(phrases):
+    Phrase.objects.bulk_create(phrases, batch_size=BUILD_CHUNK_SIZE)
+    PhraseGram.objects.bulk_create(
+        (
+            PhraseGram(phrase=phrase, gram=gram)
+            for phrase in phrases
+            for gram in phrase_grams(phrase.normalized_text.split())
+            if len(gram) <= 255
+        ),
+        batch_size=BUILD_CHUNK_SIZE,
+    )
+
+
+def build_phrase_index():
+    """
+    Extract every definition and context of the dataset being imported into
+    the Phrase table, with unigram and bigram postings in PhraseGram. Phrases
+    are stored a chunk at a time, so memory does not grow with the dataset.
+    """
+    for model, source in ((Definition, 'definition'), (Context, 'context')):
+        texts = model.objects.values_list('sense_id', 'text').order_by('id')
+        phrases = []
+        for sense_id, text in texts.iterator(chunk_size=BUILD_CHUNK_SIZE):
+            normalized_text = normalize_phrase(text)
+            if normalized_text:
+                phrases.append(Phrase(sense_id=sense_id, source=source, text=text, normalized_text=normalized_text))
+            if len(phrases) >= BUILD_CHUNK_SIZE:
+                _store_phrases(phrases)
+                phrases = []
+        if phrases:
+            _store_phrases(phrases)
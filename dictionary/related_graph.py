@@ -0,0 +1,74 @@
+from collections import deque
+from .indexes import index_dir, load_index, read_json, write_json
+from .models import RelatedForm
+
+# Upper bound on the nodes returned by a single traversal
+MAX_TRAVERSAL_NODES = 1000
+
+
+class RelatedFormGraph:
+    """
+    Adjacency lists over every RelatedForm edge. Nodes are lexical entry ids
+    and relation targets (roots, derived forms, ...). Each edge is stored on
+    both of its nodes, as 'out' from the entry and 'in' on the target.
+    """
+
+    def __init__(self, adjacency):
+        self.adjacency = adjacency
+
+    @classmethod
+    def load(cls, directory):
+        return cls(read_json(directory, 'related_graph.json'))
+
+    def __contains__(self, node):
+        return node in self.adjacency
+
+    def traverse(self, start, depth, edge_types=None, direction='both'):
+        """
+        Breadth-first traversal from `start` up to `depth` hops, following only
+        edges of `edge_types` (all types if empty) in the given direction.
+        Returns the reached nodes with their distance, the edges walked, and
+        whether the traversal was cut short by MAX_TRAVERSAL_NODES.
+        """
+        distances = {start: 0}
+        edges = set()
+        truncated = False
+        frontier = deque([start])
+        while frontier:
+            node = frontier.popleft()
+            if distances[node] >= depth:
+                continue
+            for neighbour, edge_type, edge_direction in self.adjacency.get(node, []):
+                if edge_types and edge_type not in edge_types:
+                    continue
+                if direction != 'both' and edge_direction != direction:
+                    continue
+                if neighbour not in distances:
+                    if len(distances) >= MAX_TRAVERSAL_NODES:
+                        truncated = True
+                        continue
+                    distances[neighbour] = distances[node] + 1
+                    frontier.append(neighbour)
+                source, target = (node, neighbour) if edge_direction == 'out' else (neighbour, node)
+                edges.add((source, target, edge_type))
+        edges = [edge for edge in edges if edge[0] in distances and edge[1] in distances]
+        return distances, sorted(edges), truncated
+
+
+def build_related_graph(version):
+    """
+    Compile the imported RelatedForm rows of a dataset version into adjacency
+    lists with reverse edges, and store them in the version's index directory.
+    """
+    adjacency = {}
+    edges = RelatedForm.objects.values_list('lexical_entry__id', 'targets', 'type').distinct()
+    for source, target, edge_type in edges.iterator():
+        if not source or not target:
+            continue
+        adjacency.setdefault(source, []).append((target, edge_type or '', 'out'))
+        adjacency.setdefault(target, []).append((source, edge_type or '', 'in'))
+    write_json(index_dir(version), 'related_graph.json', adjacency)
+
+
+def get_related_graph():
+    return load_index('related_graph', RelatedFormGraph.load)
@@ -0,0 +1,28 @@
+from rest_framework.renderers import BaseRenderer, JSONRenderer, BrowsableAPIRenderer
+
+try:
+    import msgpack
+except ImportError:  # MessagePack support is optional
+    msgpack = None
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    Renders responses as MessagePack, a compact binary alternative to JSON
+    for high-volume clients. Requires the optional `msgpack` package.
+    """
+    media_type = 'application/x-msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, use_bin_type=True, default=str)
+
+
+# Renderers offered by the dictionary endpoints, in order of preference
+DICTIONARY_RENDERER_CLASSES = [JSONRenderer, BrowsableAPIRenderer]
+if msgpack is not None:
+    DICTIONARY_RENDERER_CLASSES.append(MessagePackRenderer)
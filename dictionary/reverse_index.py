@@ -0,0 +1,100 @@
+from collections import Counter
+import numpy as np
+from scipy import sparse
+from .indexes import index_dir, load_index, read_json, write_json
+from .models import Definition, Context
+from .utils import tokenize
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+
+class ReverseIndex:
+    """
+    BM25-weighted term matrix over the definitions and contexts of every sense,
+    used to find entries from a description of their meaning.
+    Rows are senses, columns are normalized terms.
+    """
+
+    def __init__(self, matrix, sense_entries, vocabulary):
+        self.matrix = matrix.tocsc()
+        self.sense_entries = sense_entries
+        self.vocabulary = {term: column for column, term in enumerate(vocabulary)}
+
+    @classmethod
+    def load(cls, directory):
+        matrix = sparse.load_npz(directory / 'reverse_matrix.npz')
+        sense_entries = np.load(directory / 'reverse_senses.npy')
+        vocabulary = read_json(directory, 'reverse_vocabulary.json')
+        return cls(matrix, sense_entries, vocabulary)
+
+    def search(self, query, top_k):
+        """
+        Score every sense against the query terms and return up to `top_k`
+        (lexical entry auto_id, score) pairs, best first, one per entry.
+        """
+        columns = sorted({self.vocabulary[term] for term in tokenize(query) if term in self.vocabulary})
+        if not columns:
+            return []
+
+        scores = np.asarray(self.matrix[:, columns].sum(axis=1)).ravel()
+        candidates = np.flatnonzero(scores)
+        ranked = candidates[np.argsort(-scores[candidates], kind='stable')]
+
+        # Keep the best scoring sense of each entry
+        entries = self.sense_entries[ranked]
+        _, first = np.unique(entries, return_index=True)
+        best = np.sort(first)[:top_k]
+        return list(zip(entries[best].tolist(), scores[ranked[best]].tolist()))
+
+
+def build_reverse_index(version):
+    """
+    Build the reverse-lookup index for a dataset version from the imported
+    definitions and contexts, and store it in the version's index directory.
+    """
+    sense_terms = {}
+    sense_entry = {}
+    for model in (Definition, Context):
+        for sense_id, entry_id, text in model.objects.values_list('sense_id', 'sense__lexical_entry_id', 'text').iterator():
+            sense_terms.setdefault(sense_id, []).extend(tokenize(text))
+            sense_entry[sense_id] = entry_id
+
+    vocabulary = {}
+    rows, columns, counts = [], [], []
+    sense_ids = sorted(sense_terms)
+    for row, sense_id in enumerate(sense_ids):
+        for term, count in Counter(sense_terms[sense_id]).items():
+            rows.append(row)
+            columns.append(vocabulary.setdefault(term, len(vocabulary)))
+            counts.append(count)
+
+    rows = np.asarray(rows, dtype=np.int32)
+    columns = np.asarray(columns, dtype=np.int32)
+    counts = np.asarray(counts, dtype=np.float32)
+
+    # BM25 weight of each (sense, term) pair
+    sense_count = len(sense_ids)
+    lengths = np.bincount(rows, weights=counts, minlength=sense_count)
+    average_length = lengths.mean() if sense_count else 0.0
+    document_frequency = np.bincount(columns, minlength=len(vocabulary))
+    idf = np.log1p((sense_count - document_frequency + 0.5) / (document_frequency + 0.5))
+    norm = K1 * (1 - B + B * lengths[rows] / average_length) if sense_count else counts
+    weights = idf[columns] * counts * (K1 + 1) / (counts + norm)
+
+    matrix = sparse.csr_matrix(
+        (weights.astype(np.float32), (rows, columns)),
+        shape=(sense_count, len(vocabulary)),
+    )
+    sense_entries = np.asarray([sense_entry[sense_id] for sense_id in sense_ids], dtype=np.int64)
+
+    directory = index_dir(version)
+    directory.mkdir(parents=True, exist_ok=True)
+    sparse.save_npz(directory / 'reverse_matrix.npz', matrix)
+    np.save(directory / 'reverse_senses.npy', sense_entries)
+    write_json(directory, 'reverse_vocabulary.json', sorted(vocabulary, key=vocabulary.get))
+
+
+def get_reverse_index():
+    return load_index('reverse', ReverseIndex.load)
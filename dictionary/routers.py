@@ -0,0 +1,23 @@
+from .dataset import active_alias, is_generation_alias
+
+
+class DatasetRouter:
+    """
+    Routes the dictionary models to the database of the active dataset
+    generation, and keeps the other apps on the default database.
+    """
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label == 'dictionary':
+            return active_alias()
+        return None
+
+    def db_for_write(self, model, **hints):
+        if model._meta.app_label == 'dictionary':
+            return active_alias()
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if is_generation_alias(db):
+            return app_label == 'dictionary'
+        return None
@@ -1,5 +1,5 @@
 from rest_framework.serializers import ModelSerializer
-from .models import LexicalEntry, Lemma, WordForm, RelatedForm, Sense, Definition, Context, SyntacticBehaviour
+from .models import LexicalEntry, Lemma, WordForm, RelatedForm, Sense, Definition, Context, SyntacticBehaviour, Phrase
 from rest_framework import serializers
 
 class DefinitionSerializer(ModelSerializer):
@@ -51,6 +51,22 @@ class LexicalEntrySerializer(ModelSerializer):
         model = LexicalEntry
         fields = ['id', 'part_of_speech', 'lemma', 'word_forms', 'related_forms', 'senses', 'syntactic_behaviours']
 
+class LexicalEntrySummarySerializer(ModelSerializer):
+    lemma = LemmaSerializer()
+
+    class Meta:
+        model = LexicalEntry
+        fields = ['id', 'part_of_speech', 'lemma']
+
+class PhraseSerializer(ModelSerializer):
+    sense = serializers.CharField(source='sense.id')
+    entry = serializers.CharField(source='sense.lexical_entry.id')
+    lemma = serializers.CharField(source='sense.lexical_entry.lemma.written_form', default=None)
+
+    class Meta:
+        model = Phrase
+        fields = ['text', 'source', 'sense', 'entry', 'lemma']
+
 
 class PhraseSearchQuerySerializer(serializers.Serializer):
     query = serializers.CharField(required=True, help_text="The word or phrase to search for in definitions and contexts (e.g., في الجَرِيرة، تَشْترك العَشيرة)")
@@ -74,3 +90,29 @@ class DictionaryRetrieveQuerySerializer(serializers.Serializer):
     root = serializers.CharField(required=False, help_text="Filter by root.")
     page = serializers.IntegerField(required=False, help_text="Page number for pagination.")
     page_size = serializers.IntegerField(required=False, help_text="Number of results per page.")
+
+class ReverseSearchQuerySerializer(serializers.Serializer):
+    query = serializers.CharField(required=True, help_text="A description of the meaning to look up (e.g., الماء الكثير الملح).")
+    top_k = serializers.IntegerField(required=False, default=20, min_value=1, max_value=100, help_text="Maximum number of entries to return.")
+
+class RelatedFormsQuerySerializer(serializers.Serializer):
+    node = serializers.CharField(required=True, help_text="The entry id or relation target to start from (e.g., the root كتب).")
+    depth = serializers.IntegerField(required=False, default=1, min_value=1, max_value=3, help_text="Number of hops to traverse.")
+    type = serializers.CharField(required=False, help_text="Comma-separated edge types to follow (e.g., root,derivation). All types by default.")
+    direction = serializers.ChoiceField(choices=['both', 'out', 'in'], required=False, default='both', help_text="Follow edges from entries to targets (out), back from targets (in), or both.")
+
+class PatternSearchQuerySerializer(serializers.Serializer):
+    pattern = serializers.CharField(required=False, help_text="Lemma pattern where ? stands for any letter (e.g., ?ت?ا?).")
+    scheme = serializers.CharField(required=False, help_text="Morphological scheme, matched without diacritics unless given with them (e.g., فَعَّال).")
+    root_contains = serializers.CharField(required=False, help_text="Letters that must all appear in the root (e.g., ك).")
+    page = serializers.IntegerField(required=False, help_text="Page number for pagination.")
+    page_size = serializers.IntegerField(required=False, help_text="Number of results per page.")
+
+class PhraseListQuerySerializer(serializers.Serializer):
+    query = serializers.CharField(required=True, help_text="A word or phrase, matched without regard to diacritics or spelling variations (e.g., تشترك العشيرة).")
+    exact = serializers.BooleanField(required=False, default=False, help_text="Only return phrases equal to the query, e.g. to look up an idiom.")
+    page = serializers.IntegerField(required=False, help_text="Page number for pagination.")
+    page_size = serializers.IntegerField(required=False, help_text="Number of results per page.")
+
+class HomonymQuerySerializer(serializers.Serializer):
+    query = serializers.CharField(required=True, help_text="An entry id or lemma, with or without diacritics (e.g., كتاب).")
@@ -0,0 +1,59 @@
+import threading
+
+
+class SingleFlightTimeout(Exception):
+    """
+    Raised when a caller gives up waiting for an in-flight computation.
+    """
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls sharing a key within this process: the first
+    caller runs the computation and later callers wait for and share its result,
+    or its exception.
+
+    Works under both WSGI and ASGI deployments, since Django runs each request's
+    synchronous view in its own thread in either case.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn, timeout=None):
+        """
+        Return `fn()`, running it only if no call with the same key is already
+        in flight. Waiting callers raise SingleFlightTimeout after `timeout`
+        seconds; the computation itself is never interrupted.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = self._calls[key] = _Call()
+
+        if is_leader:
+            try:
+                call.result = fn()
+            except Exception as error:
+                call.error = error
+                raise
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+            return call.result
+
+        if not call.done.wait(timeout):
+            raise SingleFlightTimeout(f"Timed out after {timeout}s waiting for {key!r}.")
+        if call.error is not None:
+            raise call.error
+        return call.result
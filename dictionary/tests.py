@@ -1,3 +1,656 @@
-from django.test import TestCase
+import contextlib
+import io
+import os
+import tempfile
+import threading
+import unittest
+import numpy as np
+from unittest import mock
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.management import call_command
+from django.db import connections
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+import populate_db
+import replay_queries
+from .dataset import UNVERSIONED, generations_dir, pinned_dataset, read_pointer, serving_generation
+from .filter_index import FilterIndex, build_filter_index
+from .homonym_index import HomonymIndex, build_homonym_index
+from .indexes import _loaded_indexes, index_dir
+from .middleware import QueryLogMiddleware
+from .models import LexicalEntry, Lemma, RelatedForm, Sense, Definition, Context
+from .pattern_index import PatternIndex, build_pattern_index
+from .phrase_index import build_phrase_index, find_phrases
+from .related_graph import RelatedFormGraph, build_related_graph
+from .reverse_index import ReverseIndex, build_reverse_index
+from .singleflight import SingleFlight, SingleFlightTimeout
+from .utils import QuerysetFilter, remove_diacritics
+from . import views
 
-# Create your tests here.
+
+def create_entry(entry_id, lemma, scheme, root, definitions=(), contexts=(), part_of_speech='noun'):
+    entry = LexicalEntry.objects.create(id=entry_id, part_of_speech=part_of_speech)
+    Lemma.objects.create(lexical_entry=entry, written_form=lemma, scheme=scheme)
+    RelatedForm.objects.create(lexical_entry=entry, targets=root, type='root')
+    sense = Sense.objects.create(lexical_entry=entry, id=f'{entry_id}_1')
+    for text in definitions:
+        Definition.objects.create(sense=sense, text=text)
+    for text in contexts:
+        Context.objects.create(sense=sense, text=text)
+    return entry
+
+
+class IndexTestCase(TestCase):
+    # Version served while no generation has been activated
+    version = UNVERSIONED
+
+    @classmethod
+    def setUpClass(cls):
+        cls.enterClassContext(override_settings(
+            DICTIONARY_GENERATIONS_DIR=cls.enterClassContext(tempfile.TemporaryDirectory()),
+            DICTIONARY_INDEX_DIR=cls.enterClassContext(tempfile.TemporaryDirectory()),
+        ))
+        super().setUpClass()
+
+    def setUp(self):
+        # Indexes are cached per version, which every test class shares
+        _loaded_indexes.clear()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.kitab = create_entry('كتاب', 'كِتَاب', 'فِعَال', 'كتب', definitions=['مجموعة صحف مكتوبة مجلدة'])
+        cls.kuttab = create_entry('كتاب', 'كُتَّاب', 'فُعَّال', 'كتب', definitions=['موضع تعليم الصبيان القراءة والكتابة'])
+        cls.qital = create_entry('قتال', 'قِتَال', 'فِعَال', 'قتل', definitions=['المحاربة بين فريقين'], contexts=['ضرب أخماسا لأسداس'])
+        cls.bahr = create_entry('بحر', 'بَحْر', 'فَعْل', 'بحر', definitions=['الماء الكثير الملح الواسع'])
+
+
+class SingleFlightTests(SimpleTestCase):
+    def run_concurrently(self, flight, search, waiters=4):
+        """
+        Call flight.do('key', search) from a leader and `waiters` other threads,
+        letting the leader's search proceed only once every waiter is blocked
+        on it. Returns each caller's result or exception.
+        """
+        entered = threading.Event()
+        barrier = threading.Barrier(waiters + 1, timeout=5)
+        outcomes = []
+
+        def leader_search():
+            entered.set()
+            barrier.wait()
+            return search()
+
+        def call(fn):
+            try:
+                outcomes.append(flight.do('key', fn))
+            except Exception as error:
+                outcomes.append(error)
+
+        leader = threading.Thread(target=call, args=(leader_search,))
+        leader.start()
+        self.assertTrue(entered.wait(5))
+        done = flight._calls['key'].done
+        wait = done.wait
+
+        def blocked_wait(timeout=None):
+            barrier.wait()
+            return wait(timeout)
+
+        done.wait = blocked_wait
+        threads = [threading.Thread(target=call, args=(search,)) for _ in range(waiters)]
+        for thread in threads:
+            thread.start()
+        for thread in [leader, *threads]:
+            thread.join()
+        return outcomes
+
+    def test_waiters_share_the_leader_result(self):
+        calls = []
+
+        def search():
+            calls.append(1)
+            return 'result'
+
+        outcomes = self.run_concurrently(SingleFlight(), search)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(outcomes, ['result'] * 5)
+
+    def test_exception_reaches_every_waiter(self):
+        def search():
+            raise ValueError('search failed')
+
+        outcomes = self.run_concurrently(SingleFlight(), search)
+        self.assertEqual(len(outcomes), 5)
+        self.assertTrue(all(isinstance(outcome, ValueError) for outcome in outcomes))
+
+    def test_waiter_times_out(self):
+        flight = SingleFlight()
+        entered = threading.Event()
+        release = threading.Event()
+
+        def search():
+            entered.set()
+            release.wait(5)
+
+        leader = threading.Thread(target=flight.do, args=('key', search))
+        leader.start()
+        self.assertTrue(entered.wait(5))
+        try:
+            with self.assertRaises(SingleFlightTimeout):
+                flight.do('key', lambda: None, timeout=0.05)
+        finally:
+            release.set()
+            leader.join()
+
+    def test_calls_after_completion_run_again(self):
+        flight = SingleFlight()
+        calls = []
+        flight.do('key', lambda: calls.append(1))
+        flight.do('key', lambda: calls.append(1))
+        self.assertEqual(len(calls), 2)
+
+
+@override_settings(DICTIONARY_GENERATIONS_DIR=tempfile.mkdtemp(), DICTIONARY_INDEX_DIR=tempfile.mkdtemp())
+class CoalesceTests(TestCase):
+    def test_timeout_returns_service_unavailable(self):
+        with mock.patch.object(views.search_flight, 'do', side_effect=SingleFlightTimeout):
+            response = self.client.get('/api/dictionary/search-by-keyword/', {'query': 'كتاب'}, HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 503)
+        self.assertNotIn('ETag', response)
+
+    def coalesce_keys(self, *params):
+        keys = []
+
+        def do(key, fn, timeout=None):
+            keys.append(key)
+            return fn()
+
+        with mock.patch.object(views.search_flight, 'do', side_effect=do):
+            for query in params:
+                self.client.get('/api/dictionary/search-by-keyword/', query, HTTP_ACCEPT='application/json')
+        return keys
+
+    def test_whitespace_variants_share_a_key(self):
+        keys = self.coalesce_keys({'query': 'كتاب'}, {'query': ' كتاب '})
+        self.assertEqual(len(keys), 2)
+        self.assertEqual(keys[0], keys[1])
+
+    def test_extra_params_change_the_key(self):
+        keys = self.coalesce_keys({'query': 'كتاب'}, {'query': 'كتاب', 'page_size': 10})
+        self.assertEqual(len(keys), 2)
+        self.assertNotEqual(keys[0], keys[1])
+
+
+class ConditionalGetTests(IndexTestCase):
+    url = '/api/dictionary/search-by-keyword/'
+
+    def get(self, params, **headers):
+        headers.setdefault('HTTP_ACCEPT', 'application/json')
+        return self.client.get(self.url, params, **headers)
+
+    def test_matching_etag_skips_the_search(self):
+        etag = self.get({'query': 'كتاب'})['ETag']
+        with mock.patch.object(views.DictionaryRetrieveAPIView, '_search') as search:
+            response = self.get({'query': ' كتاب'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        search.assert_not_called()
+
+    def test_renderer_selection_changes_the_etag(self):
+        etag = self.get({'query': 'كتاب'})['ETag']
+        self.assertNotEqual(self.get({'query': 'كتاب'}, HTTP_ACCEPT='text/html')['ETag'], etag)
+        self.assertNotEqual(self.get({'query': 'كتاب', 'format': 'json'})['ETag'], etag)
+
+    def test_client_errors_carry_no_etag(self):
+        for params in ({}, {'query': 'zzz'}):
+            response = self.get(params)
+            self.assertGreaterEqual(response.status_code, 400)
+            self.assertNotIn('ETag', response)
+
+    def test_compression_weakens_the_etag(self):
+        etag = self.get({'query': 'كتاب'})['ETag']
+        for encoding in ('br', 'gzip'):
+            response = self.get({'query': 'كتاب'}, HTTP_ACCEPT_ENCODING=encoding)
+            self.assertEqual(response['Content-Encoding'], encoding)
+            self.assertEqual(response['ETag'], 'W/' + etag)
+
+
+class QueryLogTests(IndexTestCase):
+    def test_disabled_without_a_log_path(self):
+        with self.settings(DICTIONARY_QUERY_LOG=None):
+            with self.assertRaises(MiddlewareNotUsed):
+                QueryLogMiddleware(lambda request: None)
+
+    def test_logs_only_the_search_endpoints(self):
+        with tempfile.TemporaryDirectory() as directory:
+            log_path = os.path.join(directory, 'queries.jsonl')
+            with self.settings(DICTIONARY_QUERY_LOG=log_path, DICTIONARY_QUERY_LOG_SAMPLE_RATE=1.0):
+                for path, params in (
+                    ('search-by-keyword', {'query': 'كتاب', 'page': 1}),
+                    ('search-by-root', {'root': 'كتب'}),
+                    ('phrase-search', {'query': 'zzz'}),
+                    ('pattern-search', {'pattern': '?تا?'}),
+                    ('related-forms', {'node': 'كتب'}),
+                ):
+                    self.client.get(f'/api/dictionary/{path}/', params, HTTP_ACCEPT='application/json')
+            records = replay_queries.load_log(log_path)
+
+        self.assertEqual(
+            [(record['path'], record['params'], record['status'], record['stage']) for record in records],
+            [
+                ('/api/dictionary/search-by-keyword/', {'query': ['كتاب'], 'page': ['1']}, 200, 'entry-id'),
+                ('/api/dictionary/search-by-root/', {'root': ['كتب']}, 200, 'root'),
+                ('/api/dictionary/phrase-search/', {'query': ['zzz']}, 404, 'suggestions'),
+            ],
+        )
+
+
+class ReplayReportTests(SimpleTestCase):
+    def test_percentile(self):
+        latencies = list(range(1, 11))
+        self.assertEqual(replay_queries.percentile(latencies, 0.5), 5)
+        self.assertEqual(replay_queries.percentile(latencies, 0.9), 9)
+        self.assertEqual(replay_queries.percentile(latencies, 0.99), 10)
+        self.assertEqual(replay_queries.percentile([7], 0.5), 7)
+
+    def test_report_groups_by_endpoint_and_stage(self):
+        results = [
+            ('/search/', 'exact', 200, 10.0),
+            ('/search/', 'exact', 500, 30.0),
+            ('/search/', 'suggestions', 404, 5.0),
+            ('/root/', '-', None, 1.0),
+        ]
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            replay_queries.report(results, 2.0)
+        lines = output.getvalue().splitlines()
+
+        self.assertEqual(lines[0], '4 requests in 2.0s (2.0 req/s)')
+        rows = [line.split() for line in lines[2:]]
+        self.assertEqual(
+            [row[:4] for row in rows],
+            [['/root/', '-', '1', '1'], ['/search/', 'exact', '2', '1'], ['/search/', 'suggestions', '1', '0']],
+        )
+        self.assertEqual(rows[1][4:], ['10.0', '30.0', '30.0', '30.0'])
+
+
+class QuerysetFilterTests(IndexTestCase):
+    def root_entries(self):
+        return LexicalEntry.objects.filter(related_forms__targets='كتب', related_forms__type='root').distinct()
+
+    def auto_ids(self, entries):
+        return list(entries.values_list('auto_id', flat=True))
+
+    def test_without_filters_returns_an_ordered_queryset(self):
+        entries = QuerysetFilter(self.root_entries()).apply_filters({'query': 'كتب'})
+        self.assertEqual(self.auto_ids(entries), [self.kitab.auto_id, self.kuttab.auto_id])
+        self.assertEqual(entries.count(), 2)
+
+    def test_without_filter_index_joins(self):
+        entries = QuerysetFilter(self.root_entries()).apply_filters({'scheme': 'فُعَّال'})
+        self.assertEqual(self.auto_ids(entries), [self.kuttab.auto_id])
+
+    def test_paginates_the_queryset_in_the_database(self):
+        response = self.client.get('/api/dictionary/search-by-root/', {'root': 'كتب', 'page_size': 1, 'page': 2}, HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], 2)
+        self.assertEqual([entry['lemma']['written_form'] for entry in response.json()['results']], ['كُتَّاب'])
+
+
+class FilterIndexTests(IndexTestCase):
+    filter_sets = [
+        {'part_of_speech': 'noun'},
+        {'part_of_speech': 'verb'},
+        {'scheme': 'فِعَال'},
+        {'root': 'كتب'},
+        {'part_of_speech': 'noun', 'root': 'كتب'},
+        {'scheme': 'فِعَال', 'root': 'قتل'},
+        {'part_of_speech': 'verb', 'scheme': 'فَعَلَ', 'root': 'كتب'},
+        {'root': 'zzz'},
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.kataba = create_entry('كتب', 'كَتَبَ', 'فَعَلَ', 'كتب', part_of_speech='verb')
+        build_filter_index(cls.version)
+
+    def auto_ids(self, entries):
+        return list(entries.values_list('auto_id', flat=True))
+
+    def test_postings_are_sorted_per_value(self):
+        index = FilterIndex.load(index_dir(self.version))
+        self.assertEqual(index.postings['root']['كتب'].tolist(), sorted([self.kitab.auto_id, self.kuttab.auto_id, self.kataba.auto_id]))
+        self.assertEqual(index.postings['part_of_speech']['verb'].tolist(), [self.kataba.auto_id])
+        self.assertEqual(
+            index.filter(np.array([self.bahr.auto_id, self.qital.auto_id, self.qital.auto_id]), {'scheme': 'فِعَال'}).tolist(),
+            [self.qital.auto_id],
+        )
+
+    def test_index_matches_joined_filters(self):
+        for base in (LexicalEntry.objects.all(), LexicalEntry.objects.filter(lemma__written_form__contains='ت')):
+            for filters in self.filter_sets:
+                with self.subTest(filters=filters):
+                    queryset_filter = QuerysetFilter(base)
+                    with mock.patch.object(QuerysetFilter, '_apply_joined_filters') as joined:
+                        entries = queryset_filter.apply_filters(filters)
+                    joined.assert_not_called()
+                    self.assertEqual(self.auto_ids(entries), self.auto_ids(queryset_filter._apply_joined_filters(filters)))
+
+    def test_combined_filters(self):
+        entries = QuerysetFilter(LexicalEntry.objects.all()).apply_filters({'part_of_speech': 'noun', 'root': 'كتب'})
+        self.assertEqual(self.auto_ids(entries), [self.kitab.auto_id, self.kuttab.auto_id])
+
+    def test_joins_when_matches_exceed_the_query_parameter_limit(self):
+        joined_filters = QuerysetFilter._apply_joined_filters
+        with mock.patch.object(connections['default'].features, 'max_query_params', 1), \
+                mock.patch.object(QuerysetFilter, '_apply_joined_filters', autospec=True, side_effect=joined_filters) as joined:
+            entries = QuerysetFilter(LexicalEntry.objects.all()).apply_filters({'root': 'كتب'})
+        joined.assert_called_once()
+        self.assertEqual(self.auto_ids(entries), sorted([self.kitab.auto_id, self.kuttab.auto_id, self.kataba.auto_id]))
+
+
+class ReverseIndexTests(IndexTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        build_reverse_index(cls.version)
+        cls.index = ReverseIndex.load(index_dir(cls.version))
+
+    def test_ranks_the_best_matching_entry_first(self):
+        matches = self.index.search('الماء الملح', top_k=3)
+        self.assertEqual(matches[0][0], self.bahr.auto_id)
+        self.assertGreater(matches[0][1], 0)
+
+    def test_ignores_diacritics_and_limits_results(self):
+        matches = self.index.search('المُحَارَبَة بين فريقين', top_k=1)
+        self.assertEqual([entry_id for entry_id, _ in matches], [self.qital.auto_id])
+
+    def test_unknown_terms_match_nothing(self):
+        self.assertEqual(self.index.search('zzz', top_k=5), [])
+
+
+class RelatedFormGraphTests(IndexTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        RelatedForm.objects.create(lexical_entry=cls.kitab, targets='مكتبة', type='derivation')
+        RelatedForm.objects.create(lexical_entry=cls.qital, targets='مقاتلة', type='derivation')
+        build_related_graph(cls.version)
+        cls.graph = RelatedFormGraph.load(index_dir(cls.version))
+
+    def test_depth_limits_the_traversal(self):
+        distances, edges, truncated = self.graph.traverse('كتب', 1)
+        self.assertEqual(distances, {'كتب': 0, 'كتاب': 1})
+        self.assertEqual(edges, [('كتاب', 'كتب', 'root')])
+        self.assertFalse(truncated)
+
+    def test_root_to_derivations_and_their_related_forms(self):
+        distances, edges, _ = self.graph.traverse('كتب', 2)
+        self.assertEqual(distances, {'كتب': 0, 'كتاب': 1, 'مكتبة': 2})
+        self.assertEqual(edges, [('كتاب', 'كتب', 'root'), ('كتاب', 'مكتبة', 'derivation')])
+
+    def test_edge_type_filter(self):
+        distances, edges, _ = self.graph.traverse('كتاب', 2, {'derivation'})
+        self.assertEqual(distances, {'كتاب': 0, 'مكتبة': 1})
+        self.assertEqual(edges, [('كتاب', 'مكتبة', 'derivation')])
+
+    def test_direction(self):
+        self.assertEqual(set(self.graph.traverse('كتاب', 1, direction='out')[0]), {'كتاب', 'كتب', 'مكتبة'})
+        self.assertEqual(self.graph.traverse('كتب', 1, direction='out')[0], {'كتب': 0})
+        self.assertEqual(self.graph.traverse('كتب', 2, direction='in')[0], {'كتب': 0, 'كتاب': 1})
+
+    def test_node_limit_truncates(self):
+        with mock.patch('dictionary.related_graph.MAX_TRAVERSAL_NODES', 2):
+            distances, edges, truncated = self.graph.traverse('كتب', 2)
+        self.assertEqual(distances, {'كتب': 0, 'كتاب': 1})
+        self.assertEqual(edges, [('كتاب', 'كتب', 'root')])
+        self.assertTrue(truncated)
+
+    def test_endpoint_attaches_entries(self):
+        response = self.client.get('/api/dictionary/related-forms/', {'node': 'كتب', 'depth': 2}, HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 200)
+        nodes = {node['node']: node for node in response.json()['nodes']}
+        self.assertEqual(set(nodes), {'كتب', 'كتاب', 'مكتبة'})
+        self.assertEqual(len(nodes['كتاب']['entries']), 2)
+        self.assertEqual(nodes['مكتبة']['depth'], 2)
+
+
+class HomonymIndexTests(IndexTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.kitab_plural = create_entry('كتاب2', 'كِتَابٌ', 'فِعَال', 'كتب')
+        cls.buhur = create_entry('ب1', 'بُحُور', 'فُعُول', 'بحر')
+        build_homonym_index(cls.version)
+        cls.index = HomonymIndex.load(index_dir(cls.version))
+
+    def test_id_match(self):
+        self.assertEqual(self.index.lookup('ب1'), [self.buhur.auto_id])
+
+    def test_bare_lemma_match(self):
+        self.assertEqual(self.index.lookup('بحور'), [self.buhur.auto_id])
+        self.assertEqual(
+            self.index.lookup('كتاب'),
+            sorted([self.kitab.auto_id, self.kuttab.auto_id, self.kitab_plural.auto_id]),
+        )
+
+    def test_diacritized_query(self):
+        self.assertEqual(self.index.lookup('كُتَّاب'), self.index.lookup('كتاب'))
+        self.assertEqual(self.index.lookup('بُحُور'), [self.buhur.auto_id])
+        self.assertEqual(self.index.lookup('zzz'), [])
+
+    def test_endpoint_groups_entries_by_id(self):
+        response = self.client.get('/api/dictionary/homonyms/', {'query': 'كِتَاب'}, HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], 3)
+        self.assertEqual(
+            [(group['id'], [entry['lemma']['written_form'] for entry in group['entries']]) for group in response.json()['groups']],
+            [('كتاب', ['كِتَاب', 'كُتَّاب']), ('كتاب2', ['كِتَابٌ'])],
+        )
+
+    def test_endpoint_without_match(self):
+        response = self.client.get('/api/dictionary/homonyms/', {'query': 'zzz'}, HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 404)
+
+
+class PatternIndexTests(IndexTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        build_pattern_index(cls.version)
+        cls.index = PatternIndex.load(index_dir(cls.version))
+
+    def test_wildcard_pattern(self):
+        self.assertEqual(
+            self.index.search(pattern='?تا?'),
+            sorted([self.kitab.auto_id, self.kuttab.auto_id, self.qital.auto_id]),
+        )
+        self.assertEqual(self.index.search(pattern='؟؟؟'), [self.bahr.auto_id])
+
+    def test_scheme_with_and_without_diacritics(self):
+        self.assertEqual(self.index.search(scheme='فُعَّال'), [self.kuttab.auto_id])
+        self.assertEqual(
+            self.index.search(scheme='فعال'),
+            sorted([self.kitab.auto_id, self.kuttab.auto_id, self.qital.auto_id]),
+        )
+
+    def test_criteria_are_intersected(self):
+        self.assertEqual(
+            self.index.search(scheme='فعال', root_contains='ك'),
+            sorted([self.kitab.auto_id, self.kuttab.auto_id]),
+        )
+        self.assertEqual(self.index.search(pattern='?تا?', root_contains='ل'), [self.qital.auto_id])
+
+    def test_no_match_or_no_criteria(self):
+        self.assertEqual(self.index.search(pattern='?ت?ا?'), [])
+        self.assertEqual(self.index.search(), [])
+
+
+class PhraseIndexTests(IndexTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.katib = create_entry(
+            'كاتب', 'كَاتِب', 'فَاعِل', 'كتب',
+            definitions=['من يكتب الرسائل والكتاب'],
+            contexts=['في الجَرِيرة، تَشْترك العَشيرة'],
+        )
+        build_phrase_index()
+
+    def entries(self, phrases):
+        return sorted(set(phrases.values_list('sense__lexical_entry__auto_id', flat=True)))
+
+    def test_word_with_attached_clitics(self):
+        self.assertEqual(self.entries(find_phrases('كتاب')), [self.katib.auto_id])
+        self.assertEqual(self.entries(find_phrases('الكتاب')), [self.katib.auto_id])
+        self.assertEqual(self.entries(find_phrases('رسائل')), [self.katib.auto_id])
+
+    def test_phrase_ignores_diacritics_punctuation_and_variations(self):
+        self.assertEqual(self.entries(find_phrases('في الجريرة تشترك العشيره')), [self.katib.auto_id])
+        self.assertEqual(self.entries(find_phrases('تشترك العشيرة')), [self.katib.auto_id])
+
+    def test_longer_query_requires_a_run_of_words(self):
+        self.assertEqual(self.entries(find_phrases('يكتب الرسائل الكتاب')), [])
+        self.assertEqual(self.entries(find_phrases('ضرب أخماسا لأسداس')), [self.qital.auto_id])
+
+    def test_endpoint_uses_the_phrase_index(self):
+        response = self.client.get('/api/dictionary/phrase-search/', {'query': 'كتاب'}, HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Search-Stage'], 'phrase-index')
+        self.assertEqual([entry['lemma']['written_form'] for entry in response.json()['results']], ['كَاتِب'])
+
+    def test_exact_lookup(self):
+        self.assertEqual(self.entries(find_phrases('ضرب أخماسا لأسداس', exact=True)), [self.qital.auto_id])
+        self.assertEqual(self.entries(find_phrases('ضرب أخماسا', exact=True)), [])
+
+
+def lmf_xml(definitions):
+    """
+    A minimal LMF document with one entry per (lemma, definition) pair.
+    """
+    entries = ''.join(
+        f'<LexicalEntry id="{remove_diacritics(lemma)}"><feat att="partOfSpeech" val="noun"/>'
+        f'<Lemma><feat att="writtenForm" val="{lemma}"/></Lemma>'
+        f'<Sense id="{remove_diacritics(lemma)}_1"><Definition><feat att="text" val="{definition}"/></Definition></Sense>'
+        f'</LexicalEntry>'
+        for lemma, definition in definitions
+    )
+    return f'<LexicalResource>{entries}</LexicalResource>'
+
+
+def migrate_generation(command, app_label, database, **options):
+    # The dictionary app ships without migrations, create its tables directly
+    call_command('migrate', database=database, run_syncdb=True, verbosity=0)
+
+
+@mock.patch.object(populate_db, 'call_command', migrate_generation)
+class GenerationTests(unittest.TestCase):
+    # A plain TestCase, since Django's test cases refuse connections to
+    # databases registered at runtime, such as generations
+
+    def setUp(self):
+        self.client = Client()
+        self.enterContext(override_settings(
+            DICTIONARY_GENERATIONS_DIR=self.enterContext(tempfile.TemporaryDirectory()),
+            DICTIONARY_INDEX_DIR=self.enterContext(tempfile.TemporaryDirectory()),
+        ))
+        _loaded_indexes.clear()
+        self.addCleanup(connections.close_all)
+
+    def import_xml(self, definitions):
+        file_path = os.path.join(generations_dir(), 'import.xml')
+        with open(file_path, 'w', encoding='utf-8') as f:
+            f.write(lmf_xml(definitions))
+        return populate_db.import_generation(file_path)
+
+    def search(self, query='بحر'):
+        return self.client.get('/api/dictionary/search-by-keyword/', {'query': query}, HTTP_ACCEPT='application/json')
+
+    def definition(self, response):
+        return response.json()['results'][0]['senses'][0]['definitions'][0]['text']
+
+    def test_readers_switch_on_their_next_request(self):
+        first = self.import_xml([('بَحْر', 'الماء الكثير')])
+        response = self.search()
+        self.assertTrue(response['ETag'].startswith(f'"{first}-'))
+        self.assertEqual(self.definition(response), 'الماء الكثير')
+
+        second = []
+
+        def import_during_search(key, fn, timeout=None):
+            second.append(self.import_xml([('بَحْر', 'الماء الملح')]))
+            return fn()
+
+        with mock.patch.object(views.search_flight, 'do', side_effect=import_during_search):
+            response = self.search()
+        self.assertEqual(read_pointer()['current'], second[0])
+        self.assertTrue(response['ETag'].startswith(f'"{first}-'))
+        self.assertEqual(self.definition(response), 'الماء الكثير')
+
+        response = self.search()
+        self.assertTrue(response['ETag'].startswith(f'"{second[0]}-'))
+        self.assertEqual(self.definition(response), 'الماء الملح')
+
+    def test_pinned_generation_survives_a_swap(self):
+        first = self.import_xml([('بَحْر', 'الماء الكثير')])
+        with pinned_dataset():
+            second = self.import_xml([('بَحْر', 'الماء الملح')])
+            self.assertEqual(serving_generation(), first)
+            self.assertEqual(LexicalEntry.objects.get().senses.get().definitions.get().text, 'الماء الكثير')
+        self.assertEqual(serving_generation(), second)
+
+    def test_failed_validation_keeps_the_current_generation(self):
+        first = self.import_xml([('بَحْر', 'الماء الكثير')])
+        pointer = dict(read_pointer())
+        generations = sorted(os.listdir(generations_dir()))
+        indexes = sorted(os.listdir(settings.DICTIONARY_INDEX_DIR))
+
+        with mock.patch.object(populate_db, 'validate_generation', side_effect=ValueError('Row counts differ.')):
+            with self.assertRaises(ValueError):
+                self.import_xml([('بَحْر', 'الماء الملح')])
+
+        self.assertEqual(read_pointer(), pointer)
+        self.assertEqual(sorted(os.listdir(generations_dir())), generations)
+        self.assertEqual(sorted(os.listdir(settings.DICTIONARY_INDEX_DIR)), indexes)
+        self.assertEqual(self.definition(self.search()), 'الماء الكثير')
+        self.assertEqual(pointer['current'], first)
+
+    def test_rollback_swaps_current_and_previous(self):
+        first = self.import_xml([('بَحْر', 'الماء الكثير')])
+        second = self.import_xml([('بَحْر', 'الماء الملح')])
+        self.assertEqual(read_pointer(), {'current': second, 'previous': first})
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            populate_db.rollback()
+        self.assertEqual(read_pointer(), {'current': first, 'previous': second})
+        self.assertEqual(self.definition(self.search()), 'الماء الكثير')
+
+    def test_retired_generations_are_pruned_one_swap_later(self):
+        versions = [self.import_xml([('بَحْر', f'الماء {number}')]) for number in range(3)]
+        for version in versions:
+            self.assertTrue((generations_dir() / version).is_dir())
+            self.assertTrue(index_dir(version).is_dir())
+
+        self.import_xml([('بَحْر', 'الماء الأخير')])
+        self.assertFalse((generations_dir() / versions[0]).exists())
+        self.assertFalse(index_dir(versions[0]).exists())
+        self.assertTrue((generations_dir() / versions[1]).is_dir())
+
+
+class PhraseSearchWithoutIndexTests(IndexTestCase):
+    def search(self, query):
+        return self.client.get('/api/dictionary/phrase-search/', {'query': query}, HTTP_ACCEPT='application/json')
+
+    def test_scans_texts_before_the_first_import(self):
+        response = self.search('الملح')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Search-Stage'], 'text-scan')
+        self.assertEqual([entry['lemma']['written_form'] for entry in response.json()['results']], ['بَحْر'])
+
+    def test_falls_back_to_spelling_variations(self):
+        response = self.search('المحاربه')
+        self.assertEqual(response['X-Search-Stage'], 'variations')
+        self.assertEqual([entry['lemma']['written_form'] for entry in response.json()['results']], ['قِتَال'])
+
+    def test_no_match_gives_suggestions(self):
+        self.assertEqual(self.search('zzz')['X-Search-Stage'], 'suggestions')
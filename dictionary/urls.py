@@ -1,8 +1,13 @@
 from django.urls import path
-from .views import DictionaryRetrieveAPIView, RootSearchAPIView, PhraseSearchAPIView
+from .views import DictionaryRetrieveAPIView, RootSearchAPIView, PhraseSearchAPIView, ReverseSearchAPIView, RelatedFormsAPIView, PatternSearchAPIView, PhraseListAPIView, HomonymAPIView
 
 urlpatterns = [
     path('search-by-keyword/', DictionaryRetrieveAPIView.as_view(), name='search-by-keyword'),
     path('search-by-root/', RootSearchAPIView.as_view(), name='search-by-root'),
     path('phrase-search/', PhraseSearchAPIView.as_view(), name='phrase-search'),
+    path('reverse-search/', ReverseSearchAPIView.as_view(), name='reverse-search'),
+    path('related-forms/', RelatedFormsAPIView.as_view(), name='related-forms'),
+    path('pattern-search/', PatternSearchAPIView.as_view(), name='pattern-search'),
+    path('phrases/', PhraseListAPIView.as_view(), name='phrases'),
+    path('homonyms/', HomonymAPIView.as_view(), name='homonyms'),
 ]
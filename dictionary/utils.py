@@ -1,5 +1,14 @@
 import re
+import hashlib
+import numpy as np
+from django.db import connections
 from django.db.models import Q
+from .dataset import current_version
+from .filter_index import get_filter_index
+from .models import LexicalEntry
+
+# Response header naming the search cascade stage that produced the response
+SEARCH_STAGE_HEADER = 'X-Search-Stage'
 
 # Utility function to check for diacritics
 def has_diacritics(text):
@@ -26,19 +35,74 @@ def normalize_for_variations(text):
         text = text.replace(char, replacement)
     return text
 
+# Utility function to split text into normalized search terms
+def tokenize(text):
+    """
+    Split Arabic text into terms with diacritics and tatweel removed and
+    spelling variations normalized, so indexed text and queries compare equal.
+    Single-letter terms are dropped.
+    """
+    normalized = normalize_for_variations(remove_diacritics(text)).replace('\u0640', '')
+    return [term for term in re.findall(r'\w+', normalized) if len(term) > 1]
+
+# Version of the response representation, part of every ETag. Bump it whenever
+# a code change alters what an unchanged request returns for the same dataset.
+REPRESENTATION_VERSION = '1'
+
+# Utility function to compute ETags for dictionary responses
+def dictionary_etag(request, *args, **kwargs):
+    """
+    Derive an ETag from the dataset version, the representation version and the
+    normalized request. Query parameters are sorted and stripped so equivalent
+    requests share a tag, and the Accept header is included since it selects
+    the renderer.
+    """
+    params = sorted((key, value.strip()) for key, values in request.GET.lists() for value in values)
+    fingerprint = '|'.join([
+        REPRESENTATION_VERSION,
+        request.path,
+        '&'.join(f'{key}={value}' for key, value in params),
+        request.META.get('HTTP_ACCEPT', ''),
+    ])
+    digest = hashlib.sha256(fingerprint.encode('utf-8')).hexdigest()[:32]
+    return f'"{current_version()}-{digest}"'
+
 class QuerysetFilter:
+    filter_fields = ('part_of_speech', 'scheme', 'root')
+
     def __init__(self, queryset):
         self.queryset = queryset
 
     def apply_filters(self, filters):
         """
-        Dynamically apply filters to a queryset based on provided dictionary of filters.
+        Apply the part_of_speech, scheme and root filters found in the provided
+        dictionary and return the matching lexical entries ordered by auto_id,
+        as a queryset so pagination counts and slices them in the database.
+        The base result ids are intersected with postings precomputed at import,
+        falling back to joins if the filter index has not been built or if
+        there are too many matches to pass as query parameters.
         """
+        filters = {key: value for key, value in (filters or {}).items() if key in self.filter_fields}
         if not filters:
-            return self.queryset
+            return self._entries(self.queryset)
+
+        try:
+            filter_index = get_filter_index()
+        except FileNotFoundError:
+            return self._apply_joined_filters(filters)
+        entry_ids = np.fromiter(self.queryset.values_list('auto_id', flat=True), dtype=np.int64)
+        matches = filter_index.filter(entry_ids, filters)
+        max_query_params = connections[self.queryset.db].features.max_query_params
+        if max_query_params is not None and len(matches) > max_query_params:
+            return self._apply_joined_filters(filters)
+        return LexicalEntry.objects.filter(auto_id__in=matches.tolist()).order_by('auto_id')
+
+    def _entries(self, queryset):
+        # A subquery drops the joins and duplicates of the base queryset
+        return LexicalEntry.objects.filter(auto_id__in=queryset.values('auto_id')).order_by('auto_id')
 
+    def _apply_joined_filters(self, filters):
         q_filters = Q()
-        # Dynamically apply valid filters
         for key, value in filters.items():
             if key == 'part_of_speech':
                 q_filters &= Q(part_of_speech=value)
@@ -49,4 +113,4 @@ class QuerysetFilter:
                     related_forms__targets=value,
                     related_forms__type='root'
                 )
-        return self.queryset.filter(q_filters).distinct()
+        return self._entries(self.queryset.filter(q_filters))
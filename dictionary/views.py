@@ -2,16 +2,103 @@ import difflib
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from django.conf import settings
 from django.db.models import Q
+from django.utils.cache import patch_vary_headers
+from django.views.decorators.http import condition
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
-from .models import LexicalEntry, Lemma, Definition, Context
-from .serializers import LexicalEntrySerializer
-from .utils import has_diacritics, remove_diacritics, normalize_for_variations, QuerysetFilter
+from .models import LexicalEntry, Lemma, Definition, Context, Phrase
+from .serializers import LexicalEntrySerializer, LexicalEntrySummarySerializer, PhraseSerializer
+from .utils import has_diacritics, remove_diacritics, normalize_for_variations, QuerysetFilter, dictionary_etag, SEARCH_STAGE_HEADER
+from .renderers import DICTIONARY_RENDERER_CLASSES
 from rest_framework.pagination import PageNumberPagination
-from .serializers import PhraseSearchQuerySerializer, RootSearchQuerySerializer, DictionaryRetrieveQuerySerializer
+from .serializers import PhraseSearchQuerySerializer, RootSearchQuerySerializer, DictionaryRetrieveQuerySerializer, ReverseSearchQuerySerializer, RelatedFormsQuerySerializer, PatternSearchQuerySerializer, PhraseListQuerySerializer, HomonymQuerySerializer
+from .reverse_index import get_reverse_index
+from .related_graph import get_related_graph
+from .pattern_index import get_pattern_index
+from .phrase_index import find_phrases
+from .homonym_index import get_homonym_index
+from .singleflight import SingleFlight, SingleFlightTimeout
+from .dataset import current_version
+
+# Identical searches in flight in this process, shared between concurrent requests
+search_flight = SingleFlight()
+
+class DictionaryAPIView(APIView):
+    """
+    Base view for the dictionary endpoints. Answers conditional GETs from the
+    dataset version before any search runs, and offers compact renderers.
+    """
+    renderer_classes = DICTIONARY_RENDERER_CLASSES
+
+    def dispatch(self, request, *args, **kwargs):
+        response = condition(etag_func=dictionary_etag)(super().dispatch)(request, *args, **kwargs)
+        # Errors such as a missing index or a timeout must not be revalidated
+        if not (200 <= response.status_code < 300 or response.status_code == status.HTTP_304_NOT_MODIFIED):
+            del response['ETag']
+        return response
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        # The representation depends on the negotiated renderer
+        patch_vary_headers(response, ('Accept',))
+        return response
+
+    def coalesce(self, request, search):
+        """
+        Run `search` once for all concurrent requests to this endpoint with the
+        same normalized query string, and give each caller its own response.
+        The whole query string is part of the key, since it is echoed in the
+        pagination links of the shared data.
+        """
+        params = tuple(sorted((key, ' '.join(value.split())) for key, values in request.GET.lists() for value in values))
+        key = (current_version(), request.path, request.get_host(), params)
+        try:
+            response = search_flight.do(key, search, timeout=settings.DICTIONARY_SINGLE_FLIGHT_TIMEOUT)
+        except SingleFlightTimeout:
+            return Response({'error': 'The search is taking too long, please retry.'}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        shared_response = Response(response.data, status=response.status_code)
+        if response.has_header(SEARCH_STAGE_HEADER):
+            shared_response[SEARCH_STAGE_HEADER] = response[SEARCH_STAGE_HEADER]
+        return shared_response
+
+    def get_paginator(self):
+        paginator = PageNumberPagination()
+        paginator.page_size_query_param = 'page_size'
+        paginator.page_size = 50  # Default page size
+        paginator.max_page_size = 100
+        return paginator
+
+    def paginate_entries(self, entries, request):
+        """
+        Paginate an ordered LexicalEntry queryset in the database. Returns the
+        paginator and the page's entries.
+        """
+        paginator = self.get_paginator()
+        return paginator, paginator.paginate_queryset(entries, request)
+
+    def paginate_entry_ids(self, entry_ids, request):
+        """
+        Paginate sorted lexical entry auto_ids, such as index search results,
+        fetching only the entries of the requested page. Returns the paginator
+        and the page's entries.
+        """
+        paginator = self.get_paginator()
+        page_ids = paginator.paginate_queryset(entry_ids, request)
+
+        entries = LexicalEntry.objects.in_bulk(page_ids)
+        return paginator, [entries[entry_id] for entry_id in page_ids if entry_id in entries]
 
-class DictionaryRetrieveAPIView(APIView):
+    def with_stage(self, response, stage):
+        """
+        Record which stage of the search cascade produced the response.
+        """
+        response[SEARCH_STAGE_HEADER] = stage
+        return response
+
+
+class DictionaryRetrieveAPIView(DictionaryAPIView):
     """
     API for retrieving lexical entries by query, with filtering, pagination,
     support for diacritics, spelling variations, and suggestions.
@@ -60,36 +147,45 @@ class DictionaryRetrieveAPIView(APIView):
         if not query:
             return Response({'error': 'Query parameter is required.'}, status=status.HTTP_400_BAD_REQUEST)
 
+        return self.coalesce(request, lambda: self._search(query, query_params, request))
+
+    def _search(self, query, query_params, request):
+        """
+        Run the search cascade, from exact matches down to suggestions.
+        """
         contains_diacritics = has_diacritics(query)
 
         # Step 2: Match with diacritics
         if contains_diacritics:
             lexical_entries = LexicalEntry.objects.filter(lemma__written_form=query)
             if lexical_entries.exists():
-                return self._paginate_and_respond(lexical_entries, query_params, request)
+                return self.with_stage(self._paginate_and_respond(lexical_entries, query_params, request), 'diacritized')
 
             # Match without diacritics
             stripped_query = remove_diacritics(query)
             lexical_entries = LexicalEntry.objects.filter(lemma__written_form__icontains=stripped_query)
             if lexical_entries.exists():
-                return self._paginate_and_respond(lexical_entries, query_params, request)
+                return self.with_stage(self._paginate_and_respond(lexical_entries, query_params, request), 'stripped')
 
         # Step 3: Match non-diacritized queries on LexicalEntry.id
         if not contains_diacritics:
             lexical_entries = LexicalEntry.objects.filter(id=query)
             if lexical_entries.exists():
-                return self._paginate_and_respond(lexical_entries, query_params, request)
+                return self.with_stage(self._paginate_and_respond(lexical_entries, query_params, request), 'entry-id')
 
         # Step 4: Apply spelling variations if no matches
         normalized_query = normalize_for_variations(remove_diacritics(query))
+        # The id lookup is a subquery so it uses the LexicalEntry.id index,
+        # which an OR with the lemma substring match would defeat
         lexical_entries = LexicalEntry.objects.filter(
-            Q(lemma__written_form__icontains=normalized_query) | Q(id=normalized_query)
-        ).distinct()
+            Q(auto_id__in=LexicalEntry.objects.filter(id=normalized_query).values('auto_id'))
+            | Q(lemma__written_form__icontains=normalized_query)
+        )
         if lexical_entries.exists():
-            return self._paginate_and_respond(lexical_entries, query_params, request)
+            return self.with_stage(self._paginate_and_respond(lexical_entries, query_params, request), 'variations')
 
         # Step 5: Provide suggestions if no matches
-        return self._provide_suggestions(query)
+        return self.with_stage(self._provide_suggestions(query), 'suggestions')
 
     def _paginate_and_respond(self, queryset, query_params, request):
         """
@@ -99,11 +195,7 @@ class DictionaryRetrieveAPIView(APIView):
         filtered_entries = QuerysetFilter(queryset).apply_filters(query_params)
 
         # Paginate results
-        paginator = PageNumberPagination()
-        paginator.page_size_query_param = 'page_size'
-        paginator.page_size = 50  # Default page size
-        paginator.max_page_size = 100
-        paginated_entries = paginator.paginate_queryset(filtered_entries, request)
+        paginator, paginated_entries = self.paginate_entries(filtered_entries, request)
 
         # Serialize and return paginated results
         serializer = LexicalEntrySerializer(paginated_entries, many=True)
@@ -129,7 +221,7 @@ class DictionaryRetrieveAPIView(APIView):
 
 
 
-class RootSearchAPIView(APIView):
+class RootSearchAPIView(DictionaryAPIView):
     """
     API for searching lexical entries by root, with filtering, pagination, and automated documentation.
     """
@@ -188,23 +280,19 @@ class RootSearchAPIView(APIView):
         filtered_entries = QuerysetFilter(lexical_entries).apply_filters(query_params)
 
         # Step 4: Paginate the results
-        paginator = PageNumberPagination()
-        paginator.page_size_query_param = 'page_size'
-        paginator.page_size = 50  # Default page size
-        paginator.max_page_size = 100
-        paginated_entries = paginator.paginate_queryset(filtered_entries, request)
+        paginator, paginated_entries = self.paginate_entries(filtered_entries, request)
 
         # Step 5: Serialize and return the paginated results
         if paginated_entries:
             serializer = LexicalEntrySerializer(paginated_entries, many=True)
-            return paginator.get_paginated_response(serializer.data)
+            return self.with_stage(paginator.get_paginated_response(serializer.data), 'root')
 
         return Response({'message': f"No matches found for the root '{root}'."}, status=status.HTTP_404_NOT_FOUND)
 
     
 
 
-class PhraseSearchAPIView(APIView):
+class PhraseSearchAPIView(DictionaryAPIView):
     """
     API for searching idioms and phrases within definitions and contexts,
     with optional filtering, pagination, diacritic handling, and fallbacks.
@@ -255,62 +343,72 @@ class PhraseSearchAPIView(APIView):
         if not query:
             return Response({'error': 'Query parameter is required.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        contains_diacritics = has_diacritics(query)
-        stripped_query = remove_diacritics(query)
+        return self.coalesce(request, lambda: self._search(query, query_params, request))
 
-        # Determine if the query is a single word or a phrase
-        words = query.split()
-        is_phrase = len(words) > 1
+    def _search(self, query, query_params, request):
+        """
+        Search the phrases extracted from definitions and contexts, falling
+        back to suggestions. Datasets imported before the phrase index existed
+        have no Phrase rows, and are searched by scanning their texts instead.
+        """
+        stripped_query = remove_diacritics(query)
 
-        # Step 3: Perform the base search
-        if is_phrase:
-            # For phrases, perform exact substring matching
-            definitions = Definition.objects.filter(Q(text__icontains=query if contains_diacritics else stripped_query))
-            contexts = Context.objects.filter(Q(text__icontains=query if contains_diacritics else stripped_query))
+        # Steps 3 and 4: Find the entries whose definitions or contexts match
+        if Phrase.objects.exists():
+            lexical_entries, stage = self._match_phrase_index(query)
         else:
-            # For single words, retain the original logic
-            definitions = Definition.objects.filter(Q(text__icontains=query if contains_diacritics else stripped_query))
-            contexts = Context.objects.filter(Q(text__icontains=query if contains_diacritics else stripped_query))
-
-        # Step 4: Fallback to spelling variations
-        if not definitions.exists() and not contexts.exists():
-            normalized_query = normalize_for_variations(stripped_query)
-            definitions = Definition.objects.filter(Q(text__icontains=normalized_query))
-            contexts = Context.objects.filter(Q(text__icontains=normalized_query))
+            lexical_entries, stage = self._match_texts(query, stripped_query)
 
         # Step 5: Aggregate results and apply filters if matches found
-        if definitions.exists() or contexts.exists():
-            lexical_entries = self._get_lexical_entries_from_matches(definitions, contexts)
+        if lexical_entries is not None:
             filtered_entries = QuerysetFilter(lexical_entries).apply_filters(query_params)
 
             # Step 6: Paginate the filtered results
-            paginator = PageNumberPagination()
-            paginator.page_size_query_param = 'page_size'
-            paginator.page_size = 50  # Default page size
-            paginator.max_page_size = 100
-            paginated_entries = paginator.paginate_queryset(filtered_entries, request)
+            paginator, paginated_entries = self.paginate_entries(filtered_entries, request)
 
             if paginated_entries:
                 serializer = LexicalEntrySerializer(paginated_entries, many=True)
-                return paginator.get_paginated_response(serializer.data)
+                return self.with_stage(paginator.get_paginated_response(serializer.data), stage)
 
         # Step 7: Provide suggestions if no matches
-        return self._provide_suggestions(query, stripped_query)
+        return self.with_stage(self._provide_suggestions(query, stripped_query), 'suggestions')
 
-    def _get_lexical_entries_from_matches(self, definitions, contexts):
+    def _match_phrase_index(self, query):
         """
-        Helper method to aggregate matching lexical entries from definitions and contexts,
-        returning a QuerySet for further filtering and pagination.
+        Look up the phrase index, insensitive to diacritics and spelling
+        variations, preferring phrases written with the query's diacritics.
+        Returns the matching entries and the stage, or (None, None).
         """
-        lexical_entry_ids = set()
-        for definition in definitions:
-            lexical_entry_ids.add(definition.sense.lexical_entry.id)
-        for context in contexts:
-            lexical_entry_ids.add(context.sense.lexical_entry.id)
-
-        # Return a QuerySet of LexicalEntry objects
-        return LexicalEntry.objects.filter(id__in=lexical_entry_ids)
-
+        phrases = find_phrases(query)
+        stage = 'phrase-index'
+        if has_diacritics(query):
+            diacritized_phrases = phrases.filter(text__contains=query)
+            if diacritized_phrases.exists():
+                phrases = diacritized_phrases
+                stage = 'diacritized'
+        if not phrases.exists():
+            return None, None
+        return LexicalEntry.objects.filter(id__in=phrases.values('sense__lexical_entry__id')), stage
+
+    def _match_texts(self, query, stripped_query):
+        """
+        Match the query as a substring of definitions and contexts, falling
+        back to spelling variations. Returns the matching entries and the
+        stage, or (None, None).
+        """
+        for text, stage in (
+            (query if has_diacritics(query) else stripped_query, 'text-scan'),
+            (normalize_for_variations(stripped_query), 'variations'),
+        ):
+            definitions = Definition.objects.filter(text__icontains=text)
+            contexts = Context.objects.filter(text__icontains=text)
+            if definitions.exists() or contexts.exists():
+                lexical_entries = LexicalEntry.objects.filter(
+                    Q(id__in=definitions.values('sense__lexical_entry__id'))
+                    | Q(id__in=contexts.values('sense__lexical_entry__id'))
+                )
+                return lexical_entries, stage
+        return None, None
 
     def _provide_suggestions(self, query, stripped_query):
         """
@@ -327,4 +425,344 @@ class PhraseSearchAPIView(APIView):
                 'suggestions': suggestion_results
             }, status=status.HTTP_404_NOT_FOUND)
 
-        return Response({'message': f"No matches found for '{query}' and no suggestions available.'"}, status=status.HTTP_404_NOT_FOUND)
\ No newline at end of file
+        return Response({'message': f"No matches found for '{query}' and no suggestions available.'"}, status=status.HTTP_404_NOT_FOUND)
+
+
+class ReverseSearchAPIView(DictionaryAPIView):
+    """
+    API for reverse-dictionary lookups: finds the entries whose definitions and
+    contexts best match a description of a meaning, ranked with BM25.
+    """
+
+    @swagger_auto_schema(
+        query_serializer=ReverseSearchQuerySerializer,
+        responses={
+            200: openapi.Response(
+                description="Top-k entries ranked by relevance to the described meaning.",
+                schema=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        "count": openapi.Schema(type=openapi.TYPE_INTEGER, description="Number of results returned."),
+                        "results": openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Items(type=openapi.TYPE_OBJECT)),
+                    },
+                ),
+            ),
+            404: openapi.Response(
+                description="No matches found",
+                examples={
+                    "application/json": {
+                        "message": "No matches found for 'query'."
+                    }
+                }
+            ),
+            503: openapi.Response(
+                description="Index not built",
+                examples={
+                    "application/json": {
+                        "error": "The reverse-search index has not been built for this dataset."
+                    }
+                }
+            ),
+        },
+    )
+    def get(self, request):
+        # Step 1: Validate query parameters
+        serializer = ReverseSearchQuerySerializer(data=request.GET)
+        serializer.is_valid(raise_exception=True)
+        query_params = serializer.validated_data
+
+        query = query_params.get('query', '').strip()
+        if not query:
+            return Response({'error': 'Query parameter is required.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Step 2: Score all senses against the query
+        try:
+            reverse_index = get_reverse_index()
+        except FileNotFoundError:
+            return Response({'error': 'The reverse-search index has not been built for this dataset.'}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        matches = reverse_index.search(query, query_params['top_k'])
+        if not matches:
+            return Response({'message': f"No matches found for '{query}'."}, status=status.HTTP_404_NOT_FOUND)
+
+        # Step 3: Serialize the ranked entries
+        entries = LexicalEntry.objects.in_bulk([entry_id for entry_id, _ in matches])
+        results = []
+        for entry_id, score in matches:
+            if entry_id in entries:
+                result = LexicalEntrySerializer(entries[entry_id]).data
+                result['score'] = round(score, 4)
+                results.append(result)
+        return Response({'count': len(results), 'results': results})
+
+
+class RelatedFormsAPIView(DictionaryAPIView):
+    """
+    API for traversing the related-forms graph: starting from an entry id or a
+    relation target such as a root, returns every form reachable within the
+    requested depth over the selected edge types.
+    """
+
+    @swagger_auto_schema(
+        query_serializer=RelatedFormsQuerySerializer,
+        responses={
+            200: openapi.Response(
+                description="Nodes and edges reached from the starting node.",
+                schema=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        "node": openapi.Schema(type=openapi.TYPE_STRING, description="The starting node."),
+                        "truncated": openapi.Schema(type=openapi.TYPE_BOOLEAN, description="Whether the traversal hit the node limit."),
+                        "nodes": openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Items(type=openapi.TYPE_OBJECT)),
+                        "edges": openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Items(type=openapi.TYPE_OBJECT)),
+                    },
+                ),
+            ),
+            404: openapi.Response(
+                description="No matches found",
+                examples={
+                    "application/json": {
+                        "message": "No related forms found for 'كتب'."
+                    }
+                }
+            ),
+            503: openapi.Response(
+                description="Index not built",
+                examples={
+                    "application/json": {
+                        "error": "The related-forms graph has not been built for this dataset."
+                    }
+                }
+            ),
+        },
+    )
+    def get(self, request):
+        # Step 1: Validate query parameters
+        serializer = RelatedFormsQuerySerializer(data=request.GET)
+        serializer.is_valid(raise_exception=True)
+        query_params = serializer.validated_data
+
+        node = query_params['node'].strip()
+        edge_types = {edge_type.strip() for edge_type in query_params.get('type', '').split(',') if edge_type.strip()}
+
+        # Step 2: Locate the starting node, with or without diacritics
+        try:
+            graph = get_related_graph()
+        except FileNotFoundError:
+            return Response({'error': 'The related-forms graph has not been built for this dataset.'}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        if node not in graph:
+            node = remove_diacritics(node)
+        if node not in graph:
+            return Response({'message': f"No related forms found for '{query_params['node']}'."}, status=status.HTTP_404_NOT_FOUND)
+
+        # Step 3: Traverse the graph
+        distances, edges, truncated = graph.traverse(node, query_params['depth'], edge_types, query_params['direction'])
+
+        # Step 4: Attach the lexical entries behind each reached node
+        entries_by_node = {}
+        for entry in LexicalEntry.objects.filter(id__in=list(distances)).select_related('lemma'):
+            entries_by_node.setdefault(entry.id, []).append(LexicalEntrySummarySerializer(entry).data)
+
+        nodes = [
+            {'node': name, 'depth': depth, 'entries': entries_by_node.get(name, [])}
+            for name, depth in sorted(distances.items(), key=lambda item: (item[1], item[0]))
+        ]
+        return Response({
+            'node': node,
+            'truncated': truncated,
+            'nodes': nodes,
+            'edges': [{'source': source, 'target': target, 'type': edge_type} for source, target, edge_type in edges],
+        })
+
+
+class PatternSearchAPIView(DictionaryAPIView):
+    """
+    API for morphological pattern search: lemmas matching a letter pattern with
+    wildcards, a scheme, and/or root letters, resolved from precomputed postings.
+    """
+
+    @swagger_auto_schema(
+        query_serializer=PatternSearchQuerySerializer,
+        responses={
+            200: openapi.Response(
+                description="Paginated entries matching the pattern.",
+                schema=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        "count": openapi.Schema(type=openapi.TYPE_INTEGER, description="Total number of results."),
+                        "next": openapi.Schema(type=openapi.TYPE_STRING, description="URL for the next page of results."),
+                        "previous": openapi.Schema(type=openapi.TYPE_STRING, description="URL for the previous page of results."),
+                        "results": openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Items(type=openapi.TYPE_OBJECT)),
+                    },
+                ),
+            ),
+            404: openapi.Response(
+                description="No matches found",
+                examples={
+                    "application/json": {
+                        "message": "No matches found for the given pattern."
+                    }
+                }
+            ),
+            400: openapi.Response(
+                description="Bad Request",
+                examples={
+                    "application/json": {
+                        "error": "At least one of pattern, scheme or root_contains is required."
+                    }
+                }
+            ),
+        },
+    )
+    def get(self, request):
+        # Step 1: Validate query parameters
+        serializer = PatternSearchQuerySerializer(data=request.GET)
+        serializer.is_valid(raise_exception=True)
+        query_params = serializer.validated_data
+
+        pattern = query_params.get('pattern', '').strip()
+        scheme = query_params.get('scheme', '').strip()
+        root_contains = query_params.get('root_contains', '').strip()
+        if not (pattern or scheme or root_contains):
+            return Response({'error': 'At least one of pattern, scheme or root_contains is required.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Step 2: Intersect the postings of each criterion
+        try:
+            pattern_index = get_pattern_index()
+        except FileNotFoundError:
+            return Response({'error': 'The pattern index has not been built for this dataset.'}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        entry_ids = pattern_index.search(pattern, scheme, root_contains)
+
+        # Step 3: Paginate the matching ids, fetching only the requested page
+        paginator, paginated_entries = self.paginate_entry_ids(entry_ids, request)
+
+        # Step 4: Serialize and return the paginated results
+        if paginated_entries:
+            serializer = LexicalEntrySerializer(paginated_entries, many=True)
+            return paginator.get_paginated_response(serializer.data)
+
+        return Response({'message': "No matches found for the given pattern."}, status=status.HTTP_404_NOT_FOUND)
+
+
+class PhraseListAPIView(DictionaryAPIView):
+    """
+    API for listing idioms and compound phrases: phrases equal to the query, or
+    containing it as a run of words, looked up in the phrase index.
+    """
+
+    @swagger_auto_schema(
+        query_serializer=PhraseListQuerySerializer,
+        responses={
+            200: openapi.Response(
+                description="Paginated phrases matching the query, with the sense and entry they belong to.",
+                schema=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        "count": openapi.Schema(type=openapi.TYPE_INTEGER, description="Total number of results."),
+                        "next": openapi.Schema(type=openapi.TYPE_STRING, description="URL for the next page of results."),
+                        "previous": openapi.Schema(type=openapi.TYPE_STRING, description="URL for the previous page of results."),
+                        "results": openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Items(type=openapi.TYPE_OBJECT)),
+                    },
+                ),
+            ),
+            404: openapi.Response(
+                description="No matches found",
+                examples={
+                    "application/json": {
+                        "message": "No phrases found for 'query'."
+                    }
+                }
+            ),
+        },
+    )
+    def get(self, request):
+        # Step 1: Validate query parameters
+        serializer = PhraseListQuerySerializer(data=request.GET)
+        serializer.is_valid(raise_exception=True)
+        query_params = serializer.validated_data
+
+        query = query_params.get('query', '').strip()
+        if not query:
+            return Response({'error': 'Query parameter is required.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Step 2: Look up the phrase index
+        phrases = find_phrases(query, exact=query_params['exact'])
+        phrases = phrases.select_related('sense__lexical_entry__lemma').order_by('id')
+
+        # Step 3: Paginate and serialize the phrases
+        paginator = PageNumberPagination()
+        paginator.page_size_query_param = 'page_size'
+        paginator.page_size = 50  # Default page size
+        paginator.max_page_size = 100
+        paginated_phrases = paginator.paginate_queryset(phrases, request)
+
+        if paginated_phrases:
+            serializer = PhraseSerializer(paginated_phrases, many=True)
+            return paginator.get_paginated_response(serializer.data)
+
+        return Response({'message': f"No phrases found for '{query}'."}, status=status.HTTP_404_NOT_FOUND)
+
+
+class HomonymAPIView(DictionaryAPIView):
+    """
+    API for homonyms: every entry sharing the queried entry id or lemma,
+    grouped by entry id, resolved from a mapping precomputed at import.
+    """
+
+    @swagger_auto_schema(
+        query_serializer=HomonymQuerySerializer,
+        responses={
+            200: openapi.Response(
+                description="Entries sharing the id or lemma, grouped by entry id.",
+                schema=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        "count": openapi.Schema(type=openapi.TYPE_INTEGER, description="Total number of entries."),
+                        "groups": openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Items(type=openapi.TYPE_OBJECT)),
+                    },
+                ),
+            ),
+            404: openapi.Response(
+                description="No matches found",
+                examples={
+                    "application/json": {
+                        "message": "No homonyms found for 'كتاب'."
+                    }
+                }
+            ),
+            503: openapi.Response(
+                description="Index not built",
+                examples={
+                    "application/json": {
+                        "error": "The homonym index has not been built for this dataset."
+                    }
+                }
+            ),
+        },
+    )
+    def get(self, request):
+        # Step 1: Validate query parameters
+        serializer = HomonymQuerySerializer(data=request.GET)
+        serializer.is_valid(raise_exception=True)
+        query_params = serializer.validated_data
+
+        query = query_params.get('query', '').strip()
+        if not query:
+            return Response({'error': 'Query parameter is required.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Step 2: Resolve the entries sharing the id or lemma
+        try:
+            homonym_index = get_homonym_index()
+        except FileNotFoundError:
+            return Response({'error': 'The homonym index has not been built for this dataset.'}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        entry_ids = homonym_index.lookup(query)
+        if not entry_ids:
+            return Response({'message': f"No homonyms found for '{query}'."}, status=status.HTTP_404_NOT_FOUND)
+
+        # Step 3: Serialize the entries grouped by entry id
+        groups = {}
+        for entry in LexicalEntry.objects.filter(auto_id__in=entry_ids).order_by('auto_id'):
+            groups.setdefault(entry.id, []).append(LexicalEntrySerializer(entry).data)
+        return Response({
+            'count': sum(len(entries) for entries in groups.values()),
+            'groups': [{'id': entry_id, 'entries': entries} for entry_id, entries in groups.items()],
+        })
@@ -1,12 +1,24 @@
 import xml.etree.ElementTree as ET
 import os
+import shutil
+import uuid
 import django
 
 # Set up Django environment
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "your_project.settings")
 django.setup()
 
-from dictionary.models import LexicalEntry, Lemma, WordForm, RelatedForm, Sense, Definition, Context, SyntacticBehaviour
+from django.core.management import call_command
+from django.db import connections
+from dictionary.models import LexicalEntry, Lemma, WordForm, RelatedForm, Sense, Definition, Context, SyntacticBehaviour, DatasetVersion
+from dictionary.dataset import staging_generation, activate_generation, rollback_generation, read_pointer, generations_dir
+from dictionary.indexes import index_dir
+from dictionary.reverse_index import build_reverse_index
+from dictionary.related_graph import build_related_graph
+from dictionary.pattern_index import build_pattern_index
+from dictionary.phrase_index import build_phrase_index
+from dictionary.homonym_index import build_homonym_index
+from dictionary.filter_index import build_filter_index
 
 def parse_lmf_xml(file_path):
     tree = ET.parse(file_path)
@@ -145,10 +157,84 @@ def parse_lmf_xml(file_path):
     Context.objects.bulk_create(contexts, batch_size=1000)
     SyntacticBehaviour.objects.bulk_create(syntactic_behaviours, batch_size=1000)
 
+    return {
+        LexicalEntry: len(lexical_entries),
+        Lemma: len(lemmas),
+        WordForm: len(word_forms),
+        RelatedForm: len(related_forms),
+        Sense: len(senses),
+        Definition: len(definitions),
+        Context: len(contexts),
+        SyntacticBehaviour: len(syntactic_behaviours),
+    }
+
+def validate_generation(expected_counts):
+    if not expected_counts[LexicalEntry]:
+        raise ValueError("The import produced no lexical entries.")
+    for model, expected in expected_counts.items():
+        count = model.objects.count()
+        if count != expected:
+            raise ValueError(f"Expected {expected} {model.__name__} rows but the new generation has {count}.")
+
+def build_indexes(version):
+    build_reverse_index(version)
+    build_related_graph(version)
+    build_pattern_index(version)
+    build_phrase_index()
+    build_homonym_index(version)
+    build_filter_index(version)
+
+def import_generation(file_path):
+    """
+    Import the XML file into a new dataset generation, validate and index it,
+    then atomically switch readers to it. The generation being served is never
+    written to, and stays available for rollback.
+    """
+    version = uuid.uuid4().hex
+    try:
+        with staging_generation(version) as alias:
+            call_command('migrate', 'dictionary', database=alias, verbosity=0)
+            expected_counts = parse_lmf_xml(file_path)
+            validate_generation(expected_counts)
+            build_indexes(version)
+            with connections[alias].cursor() as cursor:
+                cursor.execute('ANALYZE')
+            DatasetVersion.objects.create(version=version)
+            connections[alias].close()
+    except Exception:
+        # Discard the incomplete generation
+        connections.close_all()
+        shutil.rmtree(generations_dir() / version, ignore_errors=True)
+        shutil.rmtree(index_dir(version), ignore_errors=True)
+        raise
+
+    # Requests pinned before the last swap may still read the generation it
+    # retired, so keep it until the next swap
+    retired = read_pointer().get('previous')
+    activate_generation(version)
+    prune_generations(keep=(retired,))
+    return version
+
+def prune_generations(keep=()):
+    """
+    Delete every generation except the current one, its rollback target and
+    those in `keep`, along with their indexes.
+    """
+    pointer = read_pointer()
+    kept = {pointer.get('current'), pointer.get('previous'), *keep}
+    for directory in generations_dir().iterdir():
+        if directory.is_dir() and directory.name not in kept:
+            shutil.rmtree(directory, ignore_errors=True)
+            shutil.rmtree(index_dir(directory.name), ignore_errors=True)
+
+def rollback():
+    version = rollback_generation()
+    print(f"Rolled back to dataset generation {version}.")
+
 def main():
     xml_file = "corrected_LMF-ArDict.xml"  # Replace with the path to your LMF XML file
-    parse_lmf_xml(xml_file)
-    print("Database populated successfully!")
+    version = import_generation(xml_file)
+    print(f"Database populated successfully! Now serving dataset generation {version}.")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,84 @@
+import argparse
+import json
+import math
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+# Response header naming the search cascade stage, see dictionary/utils.py
+SEARCH_STAGE_HEADER = 'X-Search-Stage'
+
+def load_log(log_path, limit=None):
+    """
+    Read the requests recorded by QueryLogMiddleware.
+    """
+    records = []
+    with open(log_path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                records.append(json.loads(line))
+            if limit and len(records) >= limit:
+                break
+    return records
+
+def replay_request(base_url, record, timeout):
+    """
+    Fire one recorded request and return (path, stage, status, milliseconds).
+    """
+    url = f"{base_url.rstrip('/')}{record['path']}?{urlencode(record['params'], doseq=True)}"
+    request = urllib.request.Request(url, headers={'Accept': 'application/json'})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            status, stage = response.status, response.headers.get(SEARCH_STAGE_HEADER)
+    except urllib.error.HTTPError as error:
+        error.read()
+        status, stage = error.code, error.headers.get(SEARCH_STAGE_HEADER)
+    except (urllib.error.URLError, TimeoutError):
+        status, stage = None, None
+    return record['path'], stage or '-', status, (time.perf_counter() - start) * 1000
+
+def percentile(sorted_values, fraction):
+    # Nearest-rank percentile
+    rank = max(math.ceil(fraction * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+def report(results, wall_seconds):
+    groups = {}
+    for path, stage, status, milliseconds in results:
+        groups.setdefault((path, stage), []).append((status, milliseconds))
+
+    print(f"{len(results)} requests in {wall_seconds:.1f}s ({len(results) / wall_seconds:.1f} req/s)")
+    print(f"{'endpoint':<40} {'stage':<12} {'count':>6} {'errors':>6} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>8}")
+    for (path, stage), samples in sorted(groups.items()):
+        latencies = sorted(milliseconds for _, milliseconds in samples)
+        errors = sum(1 for status, _ in samples if status is None or status >= 500)
+        print(
+            f"{path:<40} {stage:<12} {len(samples):>6} {errors:>6} "
+            f"{percentile(latencies, 0.5):>8.1f} {percentile(latencies, 0.9):>8.1f} "
+            f"{percentile(latencies, 0.99):>8.1f} {latencies[-1]:>8.1f}"
+        )
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a dictionary query log against a running server and report latency percentiles (ms) per endpoint and search stage.")
+    parser.add_argument('log', help="Query log written by QueryLogMiddleware.")
+    parser.add_argument('--base-url', default='http://127.0.0.1:8000', help="Server to replay against.")
+    parser.add_argument('--concurrency', type=int, default=8, help="Number of requests in flight at once.")
+    parser.add_argument('--limit', type=int, help="Replay only the first N logged requests.")
+    parser.add_argument('--timeout', type=float, default=30, help="Per-request timeout in seconds.")
+    args = parser.parse_args()
+
+    records = load_log(args.log, args.limit)
+    if not records:
+        parser.error("The query log is empty.")
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        results = list(executor.map(lambda record: replay_request(args.base_url, record, args.timeout), records))
+    report(results, time.perf_counter() - start)
+
+if __name__ == "__main__":
+    main()